@@ -4,17 +4,20 @@ LangGraph State Machine
 Implements the Supervisor-Worker pattern for autonomous research:
 - Supervisor/Router: Decides which node to execute next
 - Planner: Generates research sub-questions
-- Researcher: Searches and processes papers  
+- Researcher: Searches and processes papers (one question per step,
+  or the whole plan at once when PARALLEL_RESEARCH is enabled)
 - Writer: Synthesizes final report
 """
 
 from langgraph.graph import StateGraph, END
+from functools import lru_cache
 import logging
 
 from app.agents.state import ResearchState
 from app.agents.planner import plan_research
-from app.agents.researcher import research_topic_sync
+from app.agents.researcher import research_topic_sync, research_all_topics
 from app.agents.writer import write_report
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -35,28 +38,32 @@ def route_next_step(state: ResearchState) -> str:
     Returns:
         Name of the next node to execute
     """
+    # Read everything once; this runs on every edge traversal
+    is_complete = state.get("is_complete", False)
+    status = state.get("status")
+    plan = state.get("plan") or ()
+    current_idx = state.get("current_task_index", 0)
+    
+    # Common case first: more questions left to research
+    if plan and not is_complete and status != "error" and current_idx < len(plan):
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Research question {current_idx + 1}/{len(plan)}, routing to researcher")
+        return "researcher"
+    
     # Check for completion or error
-    if state.get("is_complete", False):
+    if is_complete:
         logger.info("Research complete, ending workflow")
         return "end"
     
-    if state.get("status") == "error":
+    if status == "error":
         logger.warning("Error state detected, ending workflow")
         return "end"
     
     # Check if we need a plan
-    if not state.get("plan"):
+    if not plan:
         logger.info("No plan exists, routing to planner")
         return "planner"
     
-    # Check if we have more questions to research
-    current_idx = state.get("current_task_index", 0)
-    plan_length = len(state.get("plan", []))
-    
-    if current_idx < plan_length:
-        logger.info(f"Research question {current_idx + 1}/{plan_length}, routing to researcher")
-        return "researcher"
-    
     # All questions answered, time to write
     logger.info("All questions researched, routing to writer")
     return "writer"
@@ -74,6 +81,11 @@ def create_research_graph() -> StateGraph:
                    v
                   END (on error/complete)
     
+    With PARALLEL_RESEARCH enabled, the researcher self-loop is replaced by
+    a single researcher_batch node that covers the whole plan:
+    
+        START -> planner -> route -> researcher_batch -> writer -> END
+    
     Returns:
         Compiled LangGraph workflow
     """
@@ -84,9 +96,15 @@ def create_research_graph() -> StateGraph:
     
     # Add nodes
     workflow.add_node("planner", plan_research)
-    workflow.add_node("researcher", research_topic_sync)
     workflow.add_node("writer", write_report)
     
+    if settings.PARALLEL_RESEARCH:
+        researcher_node = "researcher_batch"
+        workflow.add_node(researcher_node, research_all_topics)
+    else:
+        researcher_node = "researcher"
+        workflow.add_node(researcher_node, research_topic_sync)
+    
     # Set entry point - always start by routing
     workflow.set_entry_point("planner")
     
@@ -96,22 +114,26 @@ def create_research_graph() -> StateGraph:
         route_next_step,
         {
             "planner": "planner",      # Retry planning if needed
-            "researcher": "researcher", # Start researching
+            "researcher": researcher_node, # Start researching
             "writer": "writer",         # Skip to writing (edge case)
             "end": END
         }
     )
     
-    # Add conditional edges from researcher
-    workflow.add_conditional_edges(
-        "researcher",
-        route_next_step,
-        {
-            "researcher": "researcher",  # More questions to research
-            "writer": "writer",          # All questions done
-            "end": END
-        }
-    )
+    if settings.PARALLEL_RESEARCH:
+        # The batch node answers every question, so go straight to writing
+        workflow.add_edge(researcher_node, "writer")
+    else:
+        # Add conditional edges from researcher
+        workflow.add_conditional_edges(
+            researcher_node,
+            route_next_step,
+            {
+                "researcher": researcher_node,  # More questions to research
+                "writer": "writer",             # All questions done
+                "end": END
+            }
+        )
     
     # Writer always ends
     workflow.add_edge("writer", END)
@@ -121,13 +143,12 @@ def create_research_graph() -> StateGraph:
     return workflow.compile()
 
 
-# Pre-compiled graph instance
-research_graph = None
-
-
+@lru_cache(maxsize=1)
 def get_research_graph():
-    """Get or create the research graph singleton."""
-    global research_graph
-    if research_graph is None:
-        research_graph = create_research_graph()
-    return research_graph
+    """
+    Get or create the research graph singleton.
+    
+    lru_cache makes compilation happen exactly once, even when the first
+    requests arrive concurrently, while keeping creation lazy.
+    """
+    return create_research_graph()
@@ -5,12 +5,14 @@ The Planner is a "Senior Research Director" that breaks down
 the user's research query into 3-5 searchable sub-questions.
 """
 
-import json
 import logging
 from typing import Dict, Any
 
+import orjson
+
 from app.agents.state import ResearchState
-from app.llm.client import completion
+from app.llm.cache import acached_completion
+from app.llm.client import parse_json_response
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +39,7 @@ Research Goal: {query}
 Respond with a JSON array of questions:"""
 
 
-def plan_research(state: ResearchState) -> Dict[str, Any]:
+async def plan_research(state: ResearchState) -> Dict[str, Any]:
     """
     Generate a research plan from the user's query.
     
@@ -56,24 +58,15 @@ def plan_research(state: ResearchState) -> Dict[str, Any]:
     prompt = PLANNER_USER_PROMPT.format(query=query)
     
     try:
-        response = completion(
+        response = await acached_completion(
             prompt=prompt,
             model_type="smart",  # Use MiMo-V2-Flash for planning
-            system_prompt=PLANNER_SYSTEM_PROMPT
+            system_prompt=PLANNER_SYSTEM_PROMPT,
+            cache_system_prompt=True  # Fully static, ideal cache prefix
         )
         
-        # Parse the JSON response
-        # Handle potential markdown code blocks
-        cleaned_response = response.strip()
-        if cleaned_response.startswith("```"):
-            # Remove markdown code blocks
-            lines = cleaned_response.split("\n")
-            cleaned_response = "\n".join(
-                line for line in lines 
-                if not line.startswith("```")
-            )
-        
-        plan = json.loads(cleaned_response)
+        # Parse the JSON response (handles potential markdown code blocks)
+        plan = parse_json_response(response)
         
         # Validate the plan
         if not isinstance(plan, list):
@@ -95,7 +88,7 @@ def plan_research(state: ResearchState) -> Dict[str, Any]:
                     "\n".join(f"  {i+1}. {q}" for i, q in enumerate(plan))]
         }
         
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Failed to parse planner response as JSON: {e}")
         logger.error(f"Response was: {response}")
         
@@ -1,65 +1,405 @@
 import logging
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 import asyncio
-import gc
 
-from app.agents.state import ResearchState
+from app.agents.state import ResearchState, DocumentInfo
 from app.tools.arxiv_search import arxiv_searcher
-from app.tools.pdf_parser import pdf_parser
+from app.tools.pdf_parser import pdf_parser, SUMMARY_PROMPT_VERSION
 from app.config import settings
-from app.llm.client import completion
+from app.db.chroma_lazy import get_vector_store
+from app.llm.cache import acached_completion, get_cached_content, set_cached_content
+from app.llm.client import abatch_summarize
 
 logger = logging.getLogger(__name__)
 
+# Search results and PDF bytes fetched ahead of time for the next question,
+# keyed by (session_id, question index). Only used in sequential research;
+# whoever runs the graph calls cancel_prefetch when the run ends or fails.
+_prefetch_tasks: Dict[Tuple[str, int], asyncio.Task] = {}
 
-async def emit_event(session_id: str, event_type: str, data: Dict[str, Any]):
-    """Emit an event via the WebSocket manager."""
+
+def emit_event(session_id: str, event_type: str, data: Dict[str, Any]):
+    """
+    Emit an event via the WebSocket manager.
+    
+    Fire-and-forget: the event is queued for the session's emitter task,
+    so the research critical path never waits on the client's socket.
+    """
     try:
         from app.routers.websocket import manager
-        await manager.send(session_id, {"type": event_type, **data})
+        manager.publish(session_id, {"type": event_type, **data})
     except Exception as e:
         logger.error(f"Failed to emit event {event_type}: {e}")
 
 
-async def research_topic(state: ResearchState) -> Dict[str, Any]:
+async def _download_paper(
+    session_id: str,
+    paper: Dict[str, Any],
+    paper_idx: int,
+    total_papers: int,
+    semaphore: asyncio.Semaphore,
+    pdf_bytes: Optional[bytes] = None
+) -> Tuple[Optional[Dict[str, Any]], List[str]]:
     """
-    Execute research for the current plan item.
+    Download and parse a single paper.
     
-    This node:
-    1. Gets the current question from the plan
-    2. Searches ArXiv for relevant papers
-    3. Downloads and parses the top papers
-    4. Generates summaries using the "fast" model (Devstral)
-    5. Stores chunks in ChromaDB for later retrieval
+    Failures are contained here so one bad PDF doesn't abort the
+    other papers being processed alongside it.
     
     Args:
-        state: Current research state
+        session_id: Session to emit progress events to
+        paper: Paper metadata from the ArXiv search
+        paper_idx: Position of the paper in the current batch
+        total_papers: Number of papers in the current batch
+        semaphore: Caps concurrent downloads and LLM calls
+        pdf_bytes: Prefetched PDF contents, if available
         
     Returns:
-        State updates with new documents and progress
+        Tuple of (parsed PDF or None on failure, log lines)
     """
-    current_idx = state.get("current_task_index", 0)
-    session_id = state.get("session_id", "unknown")
-    plan = state.get("plan", [])
+    logs = []
     
-    # Safety check
-    if current_idx >= len(plan):
-        logger.warning("No more questions to research")
-        await emit_event(session_id, "status", {
-            "phase": "writing",
-            "message": "All research questions completed, preparing final report"
+    async with semaphore:
+        try:
+            paper_title = paper["title"]
+            
+            logs.append(f" Processing: {paper_title[:50]}...")
+            
+            # Emit downloading event
+            emit_event(session_id, "activity", {
+                "action": "downloading",
+                "message": f"Downloading PDF ({paper_idx + 1}/{total_papers})",
+                "paper": paper_title[:60],
+                "arxiv_id": paper["arxiv_id"]
+            })
+            
+            # Download and parse PDF (skip chunking if vector store is disabled;
+            # then only the summary text is used, so stop extracting once it's read)
+            parsed = await pdf_parser.download_and_parse(
+                paper["pdf_url"], 
+                skip_chunks=settings.SKIP_VECTOR_STORE,
+                pdf_bytes=pdf_bytes,
+                max_chars=settings.MAX_CONTEXT_CHARS if settings.SKIP_VECTOR_STORE else None
+            )
+            
+            # Emit reading event
+            emit_event(session_id, "activity", {
+                "action": "reading",
+                "message": f"Reading {parsed['num_characters']} characters",
+                "paper": paper_title[:60],
+                "chars": parsed['num_characters']
+            })
+            
+            return parsed, logs
+            
+        except Exception as e:
+            logger.error(f"Failed to process paper {paper.get('title', 'unknown')}: {e}")
+            logs.append(f" Failed to process paper: {str(e)[:50]}")
+            emit_event(session_id, "activity", {
+                "action": "error",
+                "message": f"Failed to process: {str(e)[:50]}"
+            })
+            return None, logs
+
+
+async def _summarize_papers(
+    session_id: str,
+    papers: List[Dict[str, Any]],
+    parsed_papers: List[Dict[str, Any]],
+    semaphore: asyncio.Semaphore
+) -> List[Optional[str]]:
+    """
+    Summarize a batch of parsed papers using the "fast" model (Devstral).
+    
+    Cached summaries are reused; the remaining papers are summarized in a
+    single batched request. Papers the batch response misses fall back to
+    one request each.
+    
+    Args:
+        session_id: Session to emit progress events to
+        papers: Paper metadata, aligned with parsed_papers
+        parsed_papers: Parsed PDFs from download_and_parse
+        semaphore: Caps concurrent LLM calls
+        
+    Returns:
+        Summaries aligned with the input, None where summarization failed
+    """
+    # Paper text is immutable, so summaries are cached by ArXiv ID
+    cache_keys = [f"summary:{p['arxiv_id']}:{SUMMARY_PROMPT_VERSION}" for p in papers]
+    summaries = [get_cached_content("fast", key) for key in cache_keys]
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    
+    for i in missing:
+        # Emit summarizing event
+        emit_event(session_id, "activity", {
+            "action": "summarizing",
+            "message": "Generating AI summary...",
+            "paper": papers[i]["title"][:60]
         })
-        return {
-            "status": "writing",
-            "logs": ["All research questions completed, preparing final report"]
+    
+    if settings.BATCH_SUMMARIZE and len(missing) > 1:
+        try:
+            async with semaphore:
+                batch = await abatch_summarize(
+                    [parsed_papers[i]["text_for_summary"] for i in missing],
+                    [papers[i]["arxiv_id"] for i in missing]
+                )
+            for i, summary in zip(missing, batch):
+                if summary:
+                    summaries[i] = summary
+                    set_cached_content("fast", cache_keys[i], summary)
+        except Exception as e:
+            logger.error(f"Batch summarization failed, summarizing individually: {e}")
+    
+    async def _summarize_one(i: int) -> Optional[str]:
+        try:
+            async with semaphore:
+                return await acached_completion(
+                    prompt=pdf_parser.get_summary_prompt(parsed_papers[i]["text_for_summary"]),
+                    model_type="fast",  # Use Devstral for summarization
+                    cache_key=cache_keys[i]
+                )
+        except Exception as e:
+            logger.error(f"Failed to summarize paper {papers[i].get('title', 'unknown')}: {e}")
+            return None
+    
+    remaining = [i for i, summary in enumerate(summaries) if summary is None]
+    results = await asyncio.gather(*[_summarize_one(i) for i in remaining])
+    for i, summary in zip(remaining, results):
+        summaries[i] = summary
+    
+    return summaries
+
+
+def _chunk_record(paper: Dict[str, Any], parsed: Dict[str, Any]) -> Tuple[str, List[str], Dict[str, str]]:
+    """Build the (doc_id, chunks, metadata) record used to store a paper."""
+    return (
+        paper["arxiv_id"],
+        parsed["chunks"],
+        {
+            "source_url": paper["pdf_url"],
+            "title": paper["title"],
+            "arxiv_id": paper["arxiv_id"]
         }
+    )
+
+
+async def _process_papers(
+    session_id: str,
+    papers: List[Dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+    pdf_bytes: Optional[Dict[str, bytes]] = None
+) -> Tuple[List[DocumentInfo], List[str]]:
+    """
+    Download, parse, summarize, and store a question's papers.
+    
+    Downloads run concurrently, then all successfully parsed papers are
+    summarized together before being stored.
+    
+    Args:
+        session_id: Session to emit progress events to
+        papers: Paper metadata from the ArXiv search
+        semaphore: Caps concurrent downloads and LLM calls
+        pdf_bytes: Prefetched PDF contents by ArXiv ID
+        
+    Returns:
+        Tuple of (document infos, log lines)
+    """
+    logs = []
+    new_documents = []
+    pdf_bytes = pdf_bytes or {}
+    
+    results = await asyncio.gather(*[
+        _download_paper(
+            session_id, paper, paper_idx, len(papers), semaphore,
+            pdf_bytes=pdf_bytes.pop(paper["arxiv_id"], None)
+        )
+        for paper_idx, paper in enumerate(papers)
+    ])
+    
+    # Results come back in submission order, so documents and logs stay ordered
+    ready_papers = []
+    ready_parsed = []
+    for paper, (parsed, paper_logs) in zip(papers, results):
+        logs.extend(paper_logs)
+        if parsed is not None:
+            ready_papers.append(paper)
+            ready_parsed.append(parsed)
+    
+    if not ready_papers:
+        return new_documents, logs
+    
+    summaries = await _summarize_papers(session_id, ready_papers, ready_parsed, semaphore)
+    
+    summarized = []
+    for paper, parsed, summary in zip(ready_papers, ready_parsed, summaries):
+        if summary is None:
+            logs.append(f" Failed to summarize paper: {paper['title'][:50]}")
+            emit_event(session_id, "activity", {
+                "action": "error",
+                "message": f"Failed to summarize: {paper['title'][:50]}"
+            })
+            continue
+        summarized.append((paper, parsed, summary))
+    
+    # Store chunks in vector database (skip if SKIP_VECTOR_STORE is enabled)
+    # All papers go in one batch so duplicates are checked and chunks are
+    # embedded in a single pass
+    if summarized and not settings.SKIP_VECTOR_STORE:
+        for paper, _, _ in summarized:
+            emit_event(session_id, "activity", {
+                "action": "storing",
+                "message": "Storing in vector database",
+                "paper": paper["title"][:60]
+            })
+        try:
+            await asyncio.to_thread(
+                get_vector_store().add_documents_batch,
+                [_chunk_record(paper, parsed) for paper, parsed, _ in summarized]
+            )
+        except Exception as e:
+            logger.error(f"Failed to store {len(summarized)} papers: {e}")
+            logs.append(f" Failed to store papers: {str(e)[:50]}")
+    elif summarized:
+        logger.info(f"Skipping vector storage (SKIP_VECTOR_STORE=true)")
+    
+    for paper, _, summary in summarized:
+        paper_title = paper["title"]
+        arxiv_id = paper["arxiv_id"]
+        
+        # Add to documents list (includes full reference info)
+        new_documents.append(DocumentInfo(
+            title=paper_title,
+            summary=summary,
+            pdf_url=paper["pdf_url"],
+            arxiv_id=arxiv_id,
+            authors=paper.get("authors", [])
+        ))
+        
+        logs.append(f"Processed: {paper_title[:40]}...")
+        
+        emit_event(session_id, "paper_complete", {
+            "title": paper_title,
+            "arxiv_id": arxiv_id,
+            "summary": summary[:200] + "..." if len(summary) > 200 else summary
+        })
+    
+    # Parsed content is freed by refcounting when this function returns;
+    # a full gc.collect() here would stall every other session on the loop
+    return new_documents, logs
+
+
+def _papers_per_question() -> int:
+    """Number of papers processed per question (1 in lightweight mode to save resources)."""
+    return 1 if settings.LIGHTWEIGHT_MODE else 2
+
+
+async def _fetch_question(
+    question: str,
+    seen_arxiv_ids: Set[str]
+) -> Tuple[List[Dict[str, Any]], Dict[str, bytes]]:
+    """
+    Search ArXiv for a question and download its top PDFs.
     
-    current_question = plan[current_idx]
-    logger.info(f"Researching question {current_idx + 1}: {current_question}")
+    Download failures are swallowed here; the researcher retries them
+    (and reports the error) when it processes the question.
+    
+    Args:
+        question: Research question to search for
+        seen_arxiv_ids: Papers already processed, which are not downloaded
+        
+    Returns:
+        Tuple of (search results, PDF bytes by ArXiv ID)
+    """
+    papers = list(await arxiv_searcher.search(question, max_results=3))
+    pdf_bytes: Dict[str, bytes] = {}
+    
+    async def _fetch_pdf(paper: Dict[str, Any]):
+        try:
+            pdf_bytes[paper["arxiv_id"]] = await pdf_parser.download_pdf(paper["pdf_url"])
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {paper['arxiv_id']}: {e}")
+    
+    new_papers = [p for p in papers if p["arxiv_id"] not in seen_arxiv_ids]
+    await asyncio.gather(*[_fetch_pdf(p) for p in new_papers[:_papers_per_question()]])
+    return papers, pdf_bytes
+
+
+def _start_prefetch(
+    session_id: str,
+    plan: List[str],
+    question_idx: int,
+    seen_arxiv_ids: Set[str]
+):
+    """
+    Start fetching a question's papers in the background, if enabled.
+    
+    Call once the current question has claimed its papers: seen_arxiv_ids is
+    read when the prefetch's search returns, so those PDFs aren't fetched twice.
+    """
+    key = (session_id, question_idx)
+    if not settings.PREFETCH_RESEARCH or question_idx >= len(plan) or key in _prefetch_tasks:
+        return
+    _prefetch_tasks[key] = asyncio.create_task(
+        _fetch_question(plan[question_idx], seen_arxiv_ids)
+    )
+
+
+def cancel_prefetch(session_id: str):
+    """Cancel and drop a session's pending prefetches (and their PDF bytes)."""
+    for key in [k for k in _prefetch_tasks if k[0] == session_id]:
+        _prefetch_tasks.pop(key).cancel()
+
+
+async def _take_prefetched(
+    session_id: str,
+    question_idx: int
+) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, bytes]]]:
+    """Wait for a question's prefetch, or return None if there isn't a usable one."""
+    task = _prefetch_tasks.pop((session_id, question_idx), None)
+    if task is None:
+        return None
+    try:
+        return await task
+    except Exception as e:
+        logger.warning(f"Prefetch for question {question_idx + 1} failed, searching again: {e}")
+        return None
+
+
+async def _research_question(
+    session_id: str,
+    plan: List[str],
+    question_idx: int,
+    semaphore: asyncio.Semaphore,
+    seen_arxiv_ids: Set[str],
+    prefetched: Optional[Tuple[List[Dict[str, Any]], Dict[str, bytes]]] = None,
+    on_claimed: Optional[Callable[[], None]] = None
+) -> Tuple[List[DocumentInfo], List[str]]:
+    """
+    Search, read, and summarize papers for a single plan question.
+    
+    Errors are logged and reported to the client rather than raised,
+    so a failing question never aborts the rest of the plan.
+    
+    Args:
+        session_id: Session to emit progress events to
+        plan: The full research plan
+        question_idx: Index of the question to research
+        semaphore: Caps concurrent paper processing across questions
+        seen_arxiv_ids: Papers already claimed this session; updated with
+            the papers this question processes
+        prefetched: Search results and PDF bytes fetched ahead of time
+        on_claimed: Called once this question's papers are in seen_arxiv_ids
+        
+    Returns:
+        Tuple of (new documents, log lines)
+    """
+    current_question = plan[question_idx]
+    logger.info(f"Researching question {question_idx + 1}: {current_question}")
     
     # Emit starting event
-    await emit_event(session_id, "researching", {
-        "question_index": current_idx,
+    emit_event(session_id, "researching", {
+        "question_index": question_idx,
         "question": current_question,
         "total_questions": len(plan),
         "phase": "searching"
@@ -72,166 +412,186 @@ async def research_topic(state: ResearchState) -> Dict[str, Any]:
     
     try:
         # Step 1: Search ArXiv
-        await emit_event(session_id, "activity", {
+        emit_event(session_id, "activity", {
             "action": "searching",
             "message": f"Searching ArXiv for papers...",
             "detail": current_question[:60]
         })
         
-        # Note: arxiv_searcher.search returns a list of dicts (or tuple if cached)
-        papers = list(arxiv_searcher.search(current_question, max_results=3))
+        if prefetched is not None:
+            papers, pdf_bytes = prefetched
+        else:
+            # Note: arxiv_searcher.search returns a tuple of dicts (shared with the cache)
+            papers = list(await arxiv_searcher.search(current_question, max_results=3))
+            pdf_bytes = {}
         logs.append(f" Found {len(papers)} papers on ArXiv")
         
-        await emit_event(session_id, "activity", {
+        emit_event(session_id, "activity", {
             "action": "found_papers",
             "message": f"Found {len(papers)} papers",
             "papers": [{"title": p["title"][:80], "id": p["arxiv_id"]} for p in papers]
         })
         
+        # Skip papers another question already processed, then claim ours
+        # before awaiting anything so concurrent questions never overlap
+        new_papers = [p for p in papers if p["arxiv_id"] not in seen_arxiv_ids]
+        if len(new_papers) < len(papers):
+            logs.append(f" Skipped {len(papers) - len(new_papers)} already researched papers")
+        papers = new_papers[:_papers_per_question()]
+        seen_arxiv_ids.update(p["arxiv_id"] for p in papers)
+        if on_claimed is not None:
+            on_claimed()
+        
         if not papers:
-            logs.append(" No papers found, moving to next question")
-            await emit_event(session_id, "activity", {
+            logs.append(" No new papers found, moving to next question")
+            emit_event(session_id, "activity", {
                 "action": "no_papers",
-                "message": "No papers found, moving to next question"
+                "message": "No new papers found, moving to next question"
             })
-            return {
-                "current_task_index": current_idx + 1,
-                "status": "researching" if current_idx + 1 < len(plan) else "writing",
-                "logs": logs
-            }
-        
-        # Step 2: Process papers (limit to 1 in lightweight mode to save resources)
-        papers_to_process = 1 if settings.LIGHTWEIGHT_MODE else 2
-        for paper_idx, paper in enumerate(papers[:papers_to_process]):
-            try:
-                paper_title = paper["title"]
-                paper_url = paper["pdf_url"]
-                arxiv_id = paper["arxiv_id"]
-                
-                logs.append(f" Processing: {paper_title[:50]}...")
-                
-                # Emit downloading event
-                await emit_event(session_id, "activity", {
-                    "action": "downloading",
-                    "message": f"Downloading PDF ({paper_idx + 1}/{papers_to_process})",
-                    "paper": paper_title[:60],
-                    "arxiv_id": arxiv_id
-                })
-                
-                # Download and parse PDF (skip chunking if vector store is disabled)
-                parsed = await pdf_parser.download_and_parse(
-                    paper_url, 
-                    skip_chunks=settings.SKIP_VECTOR_STORE
-                )
-                
-                # Emit reading event
-                await emit_event(session_id, "activity", {
-                    "action": "reading",
-                    "message": f"Reading {parsed['num_characters']} characters",
-                    "paper": paper_title[:60],
-                    "chars": parsed['num_characters']
-                })
-                
-                # Emit summarizing event
-                await emit_event(session_id, "activity", {
-                    "action": "summarizing",
-                    "message": "Generating AI summary...",
-                    "paper": paper_title[:60]
-                })
-                
-                # Generate summary using fast model (Devstral)
-                summary_prompt = pdf_parser.get_summary_prompt(parsed["text_for_summary"])
-                summary = completion(
-                    prompt=summary_prompt,
-                    model_type="fast"  # Use Devstral for summarization
-                )
-                
-                # Store chunks in vector database (skip if SKIP_VECTOR_STORE is enabled)
-                if not settings.SKIP_VECTOR_STORE:
-                    await emit_event(session_id, "activity", {
-                        "action": "storing",
-                        "message": "Storing in vector database",
-                        "paper": paper_title[:60]
-                    })
-                    
-                    # Lazy import to avoid loading ChromaDB when not needed
-                    from app.db.chroma import vector_store
-                    vector_store.add_documents(
-                        chunks=parsed["chunks"],
-                        metadata={
-                            "source_url": paper_url,
-                            "title": paper_title,
-                            "arxiv_id": arxiv_id
-                        },
-                        doc_id=arxiv_id
-                    )
-                else:
-                    logger.info(f"Skipping vector storage (SKIP_VECTOR_STORE=true)")
-                
-                # Free memory from parsed content
-                del parsed
-                gc.collect()
-                
-                # Add to documents list (includes full reference info)
-                new_documents.append({
-                    "title": paper_title,
-                    "summary": summary,
-                    "pdf_url": paper_url,
-                    "arxiv_id": arxiv_id,
-                    "authors": paper.get("authors", [])
-                })
-                
-                logs.append(f"Processed: {paper_title[:40]}...")
-                
-                await emit_event(session_id, "paper_complete", {
-                    "title": paper_title,
-                    "arxiv_id": arxiv_id,
-                    "summary": summary[:200] + "..." if len(summary) > 200 else summary
-                })
-                
-            except Exception as e:
-                logger.error(f"Failed to process paper {paper.get('title', 'unknown')}: {e}")
-                logs.append(f" Failed to process paper: {str(e)[:50]}")
-                await emit_event(session_id, "activity", {
-                    "action": "error",
-                    "message": f"Failed to process: {str(e)[:50]}"
-                })
-                continue
-        
-        # Move to next question or writing phase
-        next_idx = current_idx + 1
-        is_last_question = next_idx >= len(plan)
-        
-        await emit_event(session_id, "question_complete", {
-            "question_index": current_idx,
-            "next_index": next_idx,
-            "is_complete": is_last_question,
+            return new_documents, logs
+        
+        # Step 2: Process papers
+        new_documents, paper_logs = await _process_papers(
+            session_id, papers, semaphore, pdf_bytes
+        )
+        logs.extend(paper_logs)
+        
+        emit_event(session_id, "question_complete", {
+            "question_index": question_idx,
+            "next_index": question_idx + 1,
+            "is_complete": question_idx + 1 >= len(plan),
             "documents_found": len(new_documents)
         })
         
-        return {
-            "documents": new_documents,
-            "current_task_index": next_idx,
-            "status": "writing" if is_last_question else "researching",
-            "logs": logs
-        }
+        return new_documents, logs
         
     except Exception as e:
         logger.error(f"Research error: {e}")
-        await emit_event(session_id, "error", {
+        emit_event(session_id, "error", {
             "message": str(e),
-            "question_index": current_idx
+            "question_index": question_idx
         })
         
         # Fail gracefully: log error and skip to next question
-        next_idx = current_idx + 1
-        is_last_question = next_idx >= len(plan)
+        logs.append(f"Error researching question {question_idx + 1}: {e}. Skipping to next.")
+        return new_documents, logs
+
+
+async def _all_questions_completed(session_id: str) -> Dict[str, Any]:
+    """State update for when the researcher runs with nothing left to do."""
+    logger.warning("No more questions to research")
+    emit_event(session_id, "status", {
+        "phase": "writing",
+        "message": "All research questions completed, preparing final report"
+    })
+    return {
+        "status": "writing",
+        "logs": ["All research questions completed, preparing final report"]
+    }
+
+
+async def research_topic(state: ResearchState) -> Dict[str, Any]:
+    """
+    Execute research for the current plan item.
+    
+    This node:
+    1. Gets the current question from the plan
+    2. Searches ArXiv for relevant papers
+    3. Downloads and parses the top papers
+    4. Generates summaries using the "fast" model (Devstral)
+    5. Stores chunks in ChromaDB for later retrieval
+    
+    With PREFETCH_RESEARCH, the next question's search and PDF downloads
+    run in the background meanwhile, so the next step starts on warm data.
+    
+    Args:
+        state: Current research state
         
-        return {
-            "current_task_index": next_idx,
-            "status": "writing" if is_last_question else "researching",
-            "logs": logs + [f"Error researching question {current_idx + 1}: {e}. Skipping to next."]
-        }
+    Returns:
+        State updates with new documents and progress
+    """
+    current_idx = state.get("current_task_index", 0)
+    session_id = state.get("session_id", "unknown")
+    plan = state.get("plan", [])
+    
+    # Safety check
+    if current_idx >= len(plan):
+        return await _all_questions_completed(session_id)
+    
+    seen_arxiv_ids = set(state.get("seen_arxiv_ids") or ())
+    
+    # Fetch the next question's papers while this one is read and summarized
+    # (started once this question has claimed its papers)
+    prefetched = await _take_prefetched(session_id, current_idx)
+    
+    def prefetch_next():
+        _start_prefetch(session_id, plan, current_idx + 1, seen_arxiv_ids)
+    
+    semaphore = asyncio.Semaphore(settings.RESEARCHER_CONCURRENCY)
+    new_documents, logs = await _research_question(
+        session_id, plan, current_idx, semaphore, seen_arxiv_ids, prefetched,
+        on_claimed=prefetch_next
+    )
+    
+    # Move to next question or writing phase
+    next_idx = current_idx + 1
+    is_last_question = next_idx >= len(plan)
+    
+    return {
+        "documents": new_documents,
+        "seen_arxiv_ids": seen_arxiv_ids,
+        "current_task_index": next_idx,
+        "status": "writing" if is_last_question else "researching",
+        "logs": logs
+    }
+
+
+async def research_all_topics(state: ResearchState) -> Dict[str, Any]:
+    """
+    Execute research for every remaining plan item at once.
+    
+    Batch variant of research_topic used when PARALLEL_RESEARCH is enabled:
+    all questions are researched concurrently, so the total latency is
+    bounded by the slowest question rather than the sum of all of them.
+    
+    Args:
+        state: Current research state
+        
+    Returns:
+        State updates with all new documents, ready for the writer
+    """
+    current_idx = state.get("current_task_index", 0)
+    session_id = state.get("session_id", "unknown")
+    plan = state.get("plan", [])
+    
+    # Safety check
+    if current_idx >= len(plan):
+        return await _all_questions_completed(session_id)
+    
+    logger.info(f"Researching {len(plan) - current_idx} questions in parallel")
+    
+    # One semaphore for the whole batch so RESEARCHER_CONCURRENCY is a global cap
+    semaphore = asyncio.Semaphore(settings.RESEARCHER_CONCURRENCY)
+    # Shared across the batch so two questions never process the same paper
+    seen_arxiv_ids = set(state.get("seen_arxiv_ids") or ())
+    results = await asyncio.gather(*[
+        _research_question(session_id, plan, idx, semaphore, seen_arxiv_ids)
+        for idx in range(current_idx, len(plan))
+    ])
+    
+    new_documents = []
+    logs = []
+    for question_documents, question_logs in results:
+        new_documents.extend(question_documents)
+        logs.extend(question_logs)
+    
+    return {
+        "documents": new_documents,
+        "seen_arxiv_ids": seen_arxiv_ids,
+        "current_task_index": len(plan),
+        "status": "writing",
+        "logs": logs
+    }
 
 
 # Alias for compatibility with graph.py which expects research_topic_sync
@@ -5,17 +5,46 @@ Defines the LangGraph state that is passed between all agent nodes.
 This is the single source of truth for the research session.
 """
 
-from typing import TypedDict, List, Annotated, Literal, Optional
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, TypedDict, List, Annotated, Literal, Optional, Set
 import operator
 
 
-class DocumentInfo(TypedDict):
-    """Information about a processed research paper."""
+def union_reducer(left: Set[str], right: Set[str]) -> Set[str]:
+    """Merge set updates, e.g. ArXiv IDs seen by different researcher steps."""
+    if not right:
+        return left
+    return set(left) | set(right)
+
+
+@dataclass(slots=True, frozen=True)
+class DocumentInfo:
+    """
+    Information about a processed research paper.
+    
+    Documents accumulate over the whole session, so this is a slotted
+    dataclass rather than a dict: smaller, with faster attribute access.
+    """
     title: str
     summary: str
     pdf_url: str
     arxiv_id: str
-    authors: Optional[List[str]]
+    authors: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dict for JSON serialization."""
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentInfo":
+        """Build a DocumentInfo from a dict with the same keys."""
+        return cls(
+            title=data.get("title", ""),
+            summary=data.get("summary", ""),
+            pdf_url=data.get("pdf_url", ""),
+            arxiv_id=data.get("arxiv_id", ""),
+            authors=list(data.get("authors") or [])
+        )
 
 
 class ResearchState(TypedDict):
@@ -35,8 +64,14 @@ class ResearchState(TypedDict):
     plan: List[str]
     
     # Context retrieved from papers (accumulated via operator.add)
+    # Reducers must not mutate their inputs: LangGraph applies the same
+    # update to more than one copy of a channel that shares the value
     documents: Annotated[List[DocumentInfo], operator.add]
     
+    # ArXiv IDs already processed this session, so papers returned for
+    # several questions are only downloaded and summarized once
+    seen_arxiv_ids: Annotated[Set[str], union_reducer]
+    
     # ---- Progress Tracking ----
     
     # Current position in the research plan
@@ -80,6 +115,7 @@ def create_initial_state(session_id: str, query: str) -> ResearchState:
         "messages": [],
         "plan": [],
         "documents": [],
+        "seen_arxiv_ids": set(),
         "current_task_index": 0,
         "is_complete": False,
         "status": "planning",
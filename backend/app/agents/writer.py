@@ -5,16 +5,27 @@ The Writer synthesizes all research findings into a comprehensive
 report with citations linking back to source papers.
 """
 
+import asyncio
+import io
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List
 
-from app.agents.state import ResearchState
-from app.llm.client import completion
+from app.agents.state import ResearchState, DocumentInfo
+from app.agents.researcher import emit_event
+from app.llm.cache import cached_stream_completion
 from app.config import settings
+from app.db.chroma_lazy import get_vector_store
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between report_chunk events; tokens arriving in between
+# are coalesced so a long report doesn't flood the session's event queue
+REPORT_CHUNK_INTERVAL = 0.1
 
+
+# Everything static lives in the system prompt so it forms a stable,
+# cacheable prefix; the user prompt only carries per-session data.
 WRITER_SYSTEM_PROMPT = """You are an expert academic writer and research synthesizer.
 
 Your role is to create comprehensive, well-structured research reports that:
@@ -24,12 +35,20 @@ Your role is to create comprehensive, well-structured research reports that:
 4. Use clear, professional academic language
 5. Organize information logically with headers and sections
 
-Always cite sources using markdown links: [Paper Title](pdf_url)"""
+Always cite sources using markdown links: [Paper Title](pdf_url)
+
+You will be given the original research question, the research plan,
+paper summaries, and relevant context from semantic search.
 
+Write a well-structured research report that:
+1. Opens with an executive summary
+2. Has clear sections for each major finding
+3. Includes inline citations linking to source PDFs
+4. Ends with a "References" section listing all cited papers
+5. Uses markdown formatting (headers, bullet points, bold for key terms)"""
 
-WRITER_USER_PROMPT = """Create a comprehensive research report based on the following information:
 
-## Original Research Question
+WRITER_USER_PROMPT = """## Original Research Question
 {query}
 
 ## Research Plan (Questions Investigated)
@@ -43,22 +62,122 @@ WRITER_USER_PROMPT = """Create a comprehensive research report based on the foll
 
 ---
 
-Write a well-structured research report that:
-1. Opens with an executive summary
-2. Has clear sections for each major finding
-3. Includes inline citations linking to source PDFs
-4. Ends with a "References" section listing all cited papers
-5. Uses markdown formatting (headers, bullet points, bold for key terms)
-
 Begin the report now:"""
 
 
-def write_report(state: ResearchState) -> Dict[str, Any]:
+# Length of the prompt scaffolding, excluding the per-session fields
+STATIC_PROMPT_LEN = len(WRITER_SYSTEM_PROMPT) + len(WRITER_USER_PROMPT)
+
+
+def _summaries_fit_in_context(query: str, documents: List[DocumentInfo]) -> bool:
+    """Check whether all summaries fit comfortably within MAX_CONTEXT_CHARS."""
+    total_summary_chars = sum(len(doc.summary) for doc in documents)
+    budget = settings.MAX_CONTEXT_CHARS * 0.8
+    return total_summary_chars + len(query) + STATIC_PROMPT_LEN < budget
+
+
+def _format_summaries(documents: List[DocumentInfo]) -> str:
+    """Render the paper summaries section, one markdown block per paper."""
+    buf = io.StringIO()
+    for i, doc in enumerate(documents):
+        if i:
+            buf.write("\n\n")
+        buf.write(f"### [{doc.title}]({doc.pdf_url})\n")
+        buf.write(f"**Authors:** {', '.join((doc.authors or ['Unknown'])[:3])}\n\n")
+        buf.write(doc.summary)
+    return buf.getvalue()
+
+
+def _merge_results(result_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Combine per-query search results, most similar chunks first.
+    
+    A chunk retrieved for several queries is kept once, with its best distance.
+    """
+    best: Dict[tuple, Dict[str, Any]] = {}
+    for results in result_lists:
+        for r in results:
+            key = (r["metadata"].get("doc_id"), r["text"])
+            current = best.get(key)
+            if current is None or _distance(r) < _distance(current):
+                best[key] = r
+    return sorted(best.values(), key=_distance)
+
+
+def _distance(result: Dict[str, Any]) -> float:
+    distance = result.get("distance")
+    return float("inf") if distance is None else distance
+
+
+def _format_context(context_results: List[Dict[str, Any]]) -> str:
+    """
+    Render retrieved chunks as context, truncated to MAX_CONTEXT_CHARS.
+    
+    Stops formatting chunks once the limit is reached, since anything
+    past it would be cut anyway.
+    """
+    max_chars = settings.MAX_CONTEXT_CHARS
+    buf = io.StringIO()
+    for i, r in enumerate(context_results):
+        if buf.tell() > max_chars:
+            break
+        if i:
+            buf.write("\n\n---\n\n")
+        buf.write(f"**Source:** {r['metadata'].get('title', 'Unknown')}\n\n")
+        buf.write(r["text"])
+    
+    context_text = buf.getvalue()
+    if len(context_text) > max_chars:
+        context_text = context_text[:max_chars] + "\n\n[Additional context truncated]"
+    return context_text
+
+
+async def _stream_report(session_id: str, prompt: str) -> str:
+    """
+    Generate the report, forwarding it to the client as it is written.
+    
+    Emits report_chunk events with the text generated since the previous
+    event, so the UI can render the report before it is finished.
+    
+    Args:
+        session_id: Session to emit report chunks to
+        prompt: The formatted writer prompt
+        
+    Returns:
+        The complete report
+    """
+    buf = io.StringIO()
+    pending = []
+    last_emit = time.monotonic()
+    
+    async for chunk in cached_stream_completion(
+        prompt=prompt,
+        model_type="smart",  # Use MiMo-V2-Flash for synthesis
+        system_prompt=WRITER_SYSTEM_PROMPT,
+        cache_system_prompt=True
+    ):
+        buf.write(chunk)
+        pending.append(chunk)
+        
+        now = time.monotonic()
+        if now - last_emit >= REPORT_CHUNK_INTERVAL:
+            emit_event(session_id, "report_chunk", {"text": "".join(pending)})
+            pending.clear()
+            last_emit = now
+    
+    if pending:
+        emit_event(session_id, "report_chunk", {"text": "".join(pending)})
+    
+    return buf.getvalue()
+
+
+async def write_report(state: ResearchState) -> Dict[str, Any]:
     """
     Synthesize the final research report.
     
     This node:
-    1. Retrieves relevant context via vector search
+    1. Retrieves relevant context via vector search (skipped when the
+       summaries alone fit in the context budget, see CAG_MODE)
     2. Formats all paper summaries
     3. Uses the "smart" model (MiMo-V2-Flash) to write the report
     4. Returns the final report in the messages
@@ -70,6 +189,7 @@ def write_report(state: ResearchState) -> Dict[str, Any]:
         State updates with the final report
     """
     query = state["original_query"]
+    session_id = state.get("session_id", "unknown")
     documents = state["documents"]
     plan = state["plan"]
     
@@ -83,29 +203,25 @@ def write_report(state: ResearchState) -> Dict[str, Any]:
             logger.info("Vector store disabled, using document summaries as context")
             context_text = "No vector search available - using paper summaries only."
             logs.append(" Vector store disabled, using paper summaries for context")
+        elif settings.CAG_MODE and _summaries_fit_in_context(query, documents):
+            # Cache-augmented generation: the full summaries are already in the
+            # prompt, so retrieval would only add latency and embedding cost
+            logger.info("Summaries fit in context, skipping vector search")
+            context_text = "All paper summaries fit in context - see Paper Summaries above."
+            logs.append(" Summaries fit in context, skipped vector search")
         else:
-            # Lazy import to avoid loading ChromaDB when not needed
-            from app.db.chroma import vector_store
-            context_results = vector_store.query(query, n_results=10)
-            context_text = "\n\n---\n\n".join([
-                f"**Source:** {r['metadata'].get('title', 'Unknown')}\n\n{r['text']}"
-                for r in context_results
-            ])
-            
-            # Limit context size
-            if len(context_text) > settings.MAX_CONTEXT_CHARS:
-                context_text = context_text[:settings.MAX_CONTEXT_CHARS] + "\n\n[Additional context truncated]"
+            # The query and every plan question are embedded and searched in one batch
+            result_lists = await asyncio.to_thread(
+                get_vector_store().query_batch, [query, *plan], n_results=10
+            )
+            context_results = _merge_results(result_lists)
+            context_text = _format_context(context_results)
             
             logs.append(f" Retrieved {len(context_results)} relevant chunks from vector store")
         
         # Step 2: Format paper summaries
         if documents:
-            summaries = "\n\n".join([
-                f"### [{doc['title']}]({doc['pdf_url']})\n"
-                f"**Authors:** {', '.join(doc.get('authors', ['Unknown'])[:3])}\n\n"
-                f"{doc['summary']}"
-                for doc in documents
-            ])
+            summaries = _format_summaries(documents)
         else:
             summaries = "No papers were successfully processed."
         
@@ -122,11 +238,7 @@ def write_report(state: ResearchState) -> Dict[str, Any]:
         
         logs.append("Generating final report with MiMo-V2-Flash...")
         
-        report = completion(
-            prompt=prompt,
-            model_type="smart",  # Use MiMo-V2-Flash for synthesis
-            system_prompt=WRITER_SYSTEM_PROMPT
-        )
+        report = await _stream_report(session_id, prompt)
         
         logs.append(" Research report completed!")
         
@@ -152,9 +264,9 @@ An error occurred while generating the full report. Here are the paper summaries
 
 """
             for doc in documents:
-                fallback_report += f"""### [{doc['title']}]({doc['pdf_url']})
+                fallback_report += f"""### [{doc.title}]({doc.pdf_url})
 
-{doc['summary']}
+{doc.summary}
 
 ---
 
@@ -1,4 +1,8 @@
 import os
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -9,7 +13,7 @@ class LLMConfig(BaseSettings):
     """OpenRouter LLM configuration with free open-source models."""
     
     BASE_URL: str = "https://openrouter.ai/api/v1"
-    API_KEY: str = os.getenv("OPENROUTER_API_KEY", "")
+    API_KEY: str = ""  # OPENROUTER_API_KEY
     
     # Smart model for Planning/Synthesis - Xiaomi MiMo-V2-Flash
     # 309B MoE model, excellent for reasoning and agentic workflows
@@ -19,57 +23,168 @@ class LLMConfig(BaseSettings):
     # 123B model, optimized for coding and multi-file understanding
     FAST_MODEL: str = "arcee-ai/trinity-large-preview:free"
     
+    # Send cache_control breakpoints on static system prompts
+    # Needed for prefix caching on Anthropic/Gemini models; leave off for
+    # providers that cache automatically or reject unknown content fields
+    PROMPT_CACHE_CONTROL: bool = False  # OPENROUTER_PROMPT_CACHE_CONTROL
+    
     class Config:
         env_prefix = "OPENROUTER_"
+        extra = "ignore"
 
 
 class Settings(BaseSettings):
-    """Application settings."""
+    """
+    Application settings.
+    
+    Every field is read from the environment (or .env) by pydantic-settings
+    using the field name, e.g. LIGHTWEIGHT_MODE=true.
+    """
     
     # Frontend URL for CORS (set this in production)
-    FRONTEND_URL: str = os.getenv("FRONTEND_URL", "")
+    FRONTEND_URL: str = ""
     
     # ChromaDB persistence directory
-    CHROMA_PERSIST_DIR: str = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+    CHROMA_PERSIST_DIR: str = "./chroma_db"
     
     # Embedding model selection
     # Options:
     # - "sentence-transformers/all-MiniLM-L6-v2" (default, ~90MB, local)
     # - "sentence-transformers/paraphrase-MiniLM-L3-v2" (smaller, ~60MB, local)
     # - "default" (ChromaDB's default, no download required)
-    EMBEDDING_MODEL: str = os.getenv(
-        "EMBEDDING_MODEL", 
-        "sentence-transformers/all-MiniLM-L6-v2"
-    )
+    # - "onnx-minilm" (all-MiniLM-L6-v2 in ONNX Runtime with int8 weights, fastest
+    #   on CPU; export the model to ONNX_MODEL_DIR first, see app/db/embedders)
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    
+    # Exported ONNX model directory (model.onnx + tokenizer.json) for "onnx-minilm"
+    # With ONNX_QUANTIZE, an int8 copy is created there on first use
+    ONNX_MODEL_DIR: str = "./onnx/all-MiniLM-L6-v2"
+    ONNX_QUANTIZE: bool = True
     
     # Use lightweight mode for resource-constrained environments (like Render free tier)
     # When True, uses ChromaDB's default embeddings (no model download)
-    LIGHTWEIGHT_MODE: bool = os.getenv("LIGHTWEIGHT_MODE", "false").lower() == "true"
+    LIGHTWEIGHT_MODE: bool = False
+    
+    # CPU threads for embedding inference (OMP/MKL/PyTorch)
+    # None = all available cores; ignored in LIGHTWEIGHT_MODE
+    EMBEDDING_THREADS: Optional[int] = None
     
     # Skip vector store entirely (saves ~200MB RAM)
     # Auto-enabled when LIGHTWEIGHT_MODE is True, but can be set explicitly
     # When True: PDFs are still parsed and summarized, but not stored in ChromaDB
     # Report quality is maintained - summaries are passed directly to Writer
-    SKIP_VECTOR_STORE: bool = os.getenv(
-        "SKIP_VECTOR_STORE",
-        os.getenv("LIGHTWEIGHT_MODE", "false")  # Inherit from LIGHTWEIGHT_MODE
-    ).lower() == "true"
+    SKIP_VECTOR_STORE: Optional[bool] = None  # None = inherit from LIGHTWEIGHT_MODE
+    
+    # Maximum number of papers processed concurrently by the Researcher
+    # Caps parallel PDF downloads and OpenRouter summary calls
+    RESEARCHER_CONCURRENCY: int = 4
+    
+    # Research all plan questions concurrently in a single graph step
+    # Disabled by default in LIGHTWEIGHT_MODE to keep peak memory low
+    PARALLEL_RESEARCH: Optional[bool] = None  # None = not LIGHTWEIGHT_MODE
+    
+    # In sequential research, search ArXiv and download PDFs for the next
+    # question while the current one is being summarized
+    # Disabled by default in LIGHTWEIGHT_MODE since prefetched PDFs are held in memory
+    PREFETCH_RESEARCH: Optional[bool] = None  # None = not LIGHTWEIGHT_MODE
+    
+    # Summarize all of a question's papers in one LLM request instead of one each
+    BATCH_SUMMARIZE: bool = True
     
     # ArXiv rate limiting
     ARXIV_RATE_LIMIT_SECONDS: float = 3.0
     ARXIV_MAX_RESULTS: int = 10
     
+    # ArXiv search result caching (results for a query change on the order of days)
+    ARXIV_CACHE_MAX_ENTRIES: int = 1000
+    ARXIV_CACHE_TTL_SECONDS: int = 12 * 60 * 60
+    
     # PDF parsing
     PDF_CHUNK_SIZE: int = 1000
     PDF_CHUNK_OVERLAP: int = 200
     
+    # Worker processes extracting the pages of long PDFs in parallel
+    # 1 = extract in-process; defaults to 1 in LIGHTWEIGHT_MODE
+    PDF_EXTRACT_WORKERS: Optional[int] = None  # None = min(4, CPUs)
+    
+    # Parsed PDFs (summary text + chunks) cached on disk by content hash,
+    # so papers seen before skip extraction and chunking
+    # Off by default: the SQLite file under PDF_CACHE_DIR is never pruned,
+    # so clear it yourself when it grows too large
+    PDF_CACHE_ENABLED: bool = False
+    PDF_CACHE_DIR: str = "./pdf_cache"
+    
+    # PDF reports: directory with DejaVuSans.ttf, DejaVuSans-Bold.ttf and
+    # DejaVuSansMono.ttf (e.g. /usr/share/fonts/truetype/dejavu from the
+    # fonts-dejavu-core package) to embed instead of Helvetica/Courier, keeping
+    # Greek/math characters rather than ASCII stand-ins. Empty = built-in
+    # Latin-1 fonts, which render about twice as fast and give smaller files
+    PDF_UNICODE_FONT_DIR: str = ""
+    
+    # Cache-augmented generation: when all paper summaries fit within
+    # MAX_CONTEXT_CHARS, the Writer skips the vector search entirely
+    CAG_MODE: bool = True
+    
+    # LLM response caching
+    # Identical planner/writer prompts are served from memory for LLM_CACHE_TTL_SECONDS,
+    # paper summaries (keyed by ArXiv ID) for LLM_CONTENT_CACHE_TTL_SECONDS
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    LLM_CONTENT_CACHE_TTL_SECONDS: int = 30 * 24 * 60 * 60
+    
+    # Vector search: keep an fp32 copy of the whole collection in memory and
+    # answer queries with a brute-force scan instead of a Chroma round-trip
+    # Best for collections up to ~100k chunks; takes precedence over QUANTIZED_SEARCH
+    RAG_IN_MEMORY_CACHE: bool = False
+    
+    # Vector search: scan an in-memory int8 copy of the embeddings first and
+    # rerank the top n_results * QUANTIZED_RERANK_FACTOR candidates exactly
+    # Costs ~1 byte per dimension per chunk of RAM, so off by default
+    QUANTIZED_SEARCH: bool = False
+    QUANTIZED_RERANK_FACTOR: int = 4
+    
+    # Research session storage
+    # Empty = in-process memory (lost on restart, not shared between workers);
+    # set e.g. redis://localhost:6379/0 to keep sessions in Redis instead
+    REDIS_URL: str = ""
+    SESSION_TTL_SECONDS: int = 24 * 60 * 60
+    # Sessions kept per store without Redis (least recently used are dropped first)
+    SESSION_MEMORY_MAX_ENTRIES: int = 256
+    
     # Context limits to prevent token overflow
     MAX_CONTEXT_CHARS: int = 8000
     
+    @model_validator(mode="after")
+    def _derive_lightweight_defaults(self) -> "Settings":
+        """Resolve settings that default from LIGHTWEIGHT_MODE once it is known."""
+        if self.SKIP_VECTOR_STORE is None:
+            self.SKIP_VECTOR_STORE = self.LIGHTWEIGHT_MODE
+        if self.PARALLEL_RESEARCH is None:
+            self.PARALLEL_RESEARCH = not self.LIGHTWEIGHT_MODE
+        if self.PREFETCH_RESEARCH is None:
+            self.PREFETCH_RESEARCH = not self.LIGHTWEIGHT_MODE
+        if self.PDF_EXTRACT_WORKERS is None:
+            self.PDF_EXTRACT_WORKERS = 1 if self.LIGHTWEIGHT_MODE else min(4, os.cpu_count() or 1)
+        return self
+    
     class Config:
         env_file = ".env"
+        extra = "ignore"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the application settings singleton."""
+    return Settings()
+
+
+@lru_cache(maxsize=1)
+def get_llm_config() -> LLMConfig:
+    """Get the LLM configuration singleton."""
+    return LLMConfig()
 
 
-settings = Settings()
-llm_config = LLMConfig()
+settings = get_settings()
+llm_config = get_llm_config()
 
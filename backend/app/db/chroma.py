@@ -9,22 +9,73 @@ Provides vector storage and retrieval for RAG using:
 
 import chromadb
 from chromadb.utils import embedding_functions
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Any, Callable, Iterator, List, Dict, Optional, Tuple
 import logging
 import os
+import threading
+
+import numpy as np
 
 from app.config import settings
+from app.db.memory_index import InMemoryIndex
+from app.db.quantized_index import QuantizedIndex
+from app.db.topk import top_k
 
 logger = logging.getLogger(__name__)
 
 
+def get_embedding_key() -> str:
+    """Identify the configured embedding backend (model name or "default")."""
+    if settings.LIGHTWEIGHT_MODE or settings.EMBEDDING_MODEL == "default":
+        return "default"
+    return settings.EMBEDDING_MODEL
+
+
+# Fields requested from Chroma when answering a query; the embeddings
+# themselves are never needed by callers and are the bulk of the payload
+_QUERY_INCLUDE = ["documents", "metadatas", "distances"]
+
+
+# Loaded embedding functions by get_embedding_key(), shared process-wide so
+# every VectorStore reuses the same model weights instead of reloading them
+_MODEL_CACHE: Dict[str, Callable] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1000)
+def _cached_embed_query(embedder_key: str, text: str) -> Tuple[float, ...]:
+    """
+    Embed a query string, caching the result.
+    
+    Agents re-ask similar sub-questions, so repeated queries skip the
+    embedding model's forward pass entirely.
+    """
+    embedding = _MODEL_CACHE[embedder_key]([text])[0]
+    return tuple(float(x) for x in embedding)
+
+
 def get_embedding_function():
     """
     Get the embedding function based on configuration.
     
+    The function is created once per process and cached, since loading
+    a Sentence Transformer takes seconds and holds the weights in RAM.
+    
     Returns:
         Appropriate embedding function for ChromaDB
     """
+    key = get_embedding_key()
+    with _MODEL_CACHE_LOCK:
+        embedding_fn = _MODEL_CACHE.get(key)
+        if embedding_fn is None:
+            embedding_fn = _create_embedding_function()
+            _MODEL_CACHE[key] = embedding_fn
+    return embedding_fn
+
+
+def _create_embedding_function():
+    """Create a new embedding function for the configured backend."""
     if settings.LIGHTWEIGHT_MODE:
         # Use ChromaDB's default embeddings (no model download required)
         # Good for resource-constrained environments like Render free tier
@@ -35,6 +86,15 @@ def get_embedding_function():
         logger.info("Using ChromaDB default embeddings")
         return embedding_functions.DefaultEmbeddingFunction()
     
+    if settings.EMBEDDING_MODEL == "onnx-minilm":
+        # MiniLM in ONNX Runtime with int8 weights (requires a one-time export)
+        from app.db.embedders.onnx_minilm import OnnxMiniLMEmbeddingFunction
+        logger.info(f"Using ONNX Runtime MiniLM from: {settings.ONNX_MODEL_DIR}")
+        return OnnxMiniLMEmbeddingFunction(
+            model_dir=settings.ONNX_MODEL_DIR,
+            quantize=settings.ONNX_QUANTIZE
+        )
+    
     # Use Sentence Transformers (requires model download)
     logger.info(f"Using Sentence Transformer: {settings.EMBEDDING_MODEL}")
     return embedding_functions.SentenceTransformerEmbeddingFunction(
@@ -42,6 +102,21 @@ def get_embedding_function():
     )
 
 
+def _format_query_results(results: Dict[str, Any], index: int) -> List[Dict]:
+    """Convert the index-th query of a collection.query result into result dicts."""
+    documents = results["documents"][index] if results["documents"] else []
+    metadatas = results["metadatas"][index] if results["metadatas"] else None
+    distances = results["distances"][index] if results["distances"] else None
+    return [
+        {
+            "text": doc,
+            "metadata": metadatas[i] if metadatas else {},
+            "distance": distances[i] if distances else None
+        }
+        for i, doc in enumerate(documents)
+    ]
+
+
 class VectorStore:
     """
     ChromaDB-based vector store for document chunks.
@@ -51,7 +126,7 @@ class VectorStore:
     - ChromaDB default (lightweight, no additional downloads)
     """
     
-    def __init__(self, collection_name: str = "research_papers"):
+    def __init__(self, collection_name: str = "research_papers", preload_model: bool = True):
         logger.info(f"Initializing ChromaDB with collection: {collection_name}")
         
         # Ensure persistence directory exists
@@ -62,19 +137,39 @@ class VectorStore:
             path=settings.CHROMA_PERSIST_DIR
         )
         
-        # Get appropriate embedding function
+        # Get appropriate embedding function (shared across instances)
         self.embedding_fn = get_embedding_function()
+        self.embedding_key = get_embedding_key()
+        
+        # Some backends load their weights on first use; do it now rather
+        # than inside the first request
+        if preload_model:
+            self.embedding_fn(["warmup"])
         
         # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            embedding_function=self.embedding_fn,
-            metadata={"hnsw:space": "cosine"}  # Use cosine similarity
-        )
+        self.collection_name = collection_name
+        self.collection = self._get_or_create_collection()
+        
+        # Optional int8 copy of the embeddings for a fast first-pass scan,
+        # built lazily on the first query
+        self._quantized_index = QuantizedIndex() if settings.QUANTIZED_SEARCH else None
+        self._quantized_index_lock = threading.Lock()
+        
+        # Optional fp32 mirror of the whole collection, so queries skip the DB
+        self._memory_index = InMemoryIndex() if settings.RAG_IN_MEMORY_CACHE else None
+        self._memory_index_lock = threading.Lock()
         
         logger.info(f"Collection initialized with {self.collection.count()} documents")
         logger.info(f"Lightweight mode: {settings.LIGHTWEIGHT_MODE}")
     
+    def _get_or_create_collection(self):
+        """Open the collection, creating it (with cosine distance) if needed."""
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_fn,
+            metadata={"hnsw:space": "cosine"}  # Use cosine similarity
+        )
+    
     def add_documents(
         self,
         chunks: List[str],
@@ -92,40 +187,80 @@ class VectorStore:
         Returns:
             Number of chunks added
         """
-        if not chunks:
-            logger.warning("No chunks to add")
-            return 0
+        return self.add_documents_batch([(doc_id, chunks, metadata)])
+    
+    def add_documents_batch(
+        self,
+        docs: List[Tuple[str, List[str], Dict]]
+    ) -> int:
+        """
+        Add several documents' chunks with a single duplicate check and insert.
         
-        # Generate unique IDs for each chunk
-        ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
+        Chunks already present (by ID) are skipped individually, so a
+        partially stored document is completed rather than skipped.
         
-        # Attach metadata to each chunk
-        metadatas = [
-            {
-                "source_url": metadata.get("source_url", ""),
-                "title": metadata.get("title", ""),
-                "doc_id": doc_id,
-                "chunk_index": i
-            }
-            for i in range(len(chunks))
-        ]
+        Args:
+            docs: (doc_id, chunks, metadata) for each document
+            
+        Returns:
+            Number of chunks added
+        """
+        ids = []
+        documents = []
+        metadatas = []
+        for doc_id, chunks, metadata in docs:
+            if not chunks:
+                logger.warning(f"No chunks to add for document: {doc_id}")
+                continue
+            
+            # Generate unique IDs and attach metadata to each chunk
+            # (per-document fields are looked up once, not per chunk)
+            source_url = metadata.get("source_url", "")
+            title = metadata.get("title", "")
+            ids.extend([f"{doc_id}_chunk_{i}" for i in range(len(chunks))])
+            documents.extend(chunks)
+            metadatas.extend([
+                {"source_url": source_url, "title": title, "doc_id": doc_id, "chunk_index": i}
+                for i in range(len(chunks))
+            ])
         
-        logger.info(f"Adding {len(chunks)} chunks for document: {doc_id}")
+        if not ids:
+            return 0
         
         try:
-            # Check for duplicates and skip if already exists
-            existing = self.collection.get(ids=ids[:1])
-            if existing and existing.get("ids"):
-                logger.info(f"Document {doc_id} already exists, skipping")
+            # Check for duplicates in one round-trip
+            existing_ids = set(self.collection.get(ids=ids, include=[])["ids"])
+            if existing_ids:
+                keep = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing_ids]
+                logger.info(f"Skipping {len(ids) - len(keep)} chunks that already exist")
+                ids = [ids[i] for i in keep]
+                documents = [documents[i] for i in keep]
+                metadatas = [metadatas[i] for i in keep]
+            
+            if not ids:
                 return 0
             
+            # Embed similar-length chunks together so batches pad minimally;
+            # IDs travel with their chunks, so the stored mapping is unchanged
+            order = sorted(range(len(documents)), key=lambda i: len(documents[i]))
+            ids = [ids[i] for i in order]
+            documents = [documents[i] for i in order]
+            metadatas = [metadatas[i] for i in order]
+            
+            logger.info(f"Adding {len(ids)} chunks for {len(docs)} documents")
+            embeddings = np.asarray(self.embedding_fn(documents), dtype=np.float32)
             self.collection.add(
-                documents=chunks,
+                documents=documents,
+                embeddings=embeddings,
                 ids=ids,
                 metadatas=metadatas
             )
-            logger.info(f"Successfully added {len(chunks)} chunks")
-            return len(chunks)
+            if self._quantized_index is not None and self._quantized_index.is_built:
+                self._quantized_index.add(ids, embeddings)
+            if self._memory_index is not None and self._memory_index.is_built:
+                self._memory_index.add(ids, embeddings, documents, metadatas)
+            logger.info(f"Successfully added {len(ids)} chunks")
+            return len(ids)
             
         except Exception as e:
             logger.error(f"Failed to add chunks: {e}")
@@ -160,25 +295,32 @@ class VectorStore:
         
         try:
             # Check if collection has any documents
-            if self.collection.count() == 0:
+            count = self.collection.count()
+            if count == 0:
                 logger.info("Collection is empty, returning no results")
                 return []
             
+            query_embedding = list(_cached_embed_query(self.embedding_key, query_text))
+            
+            if self._memory_index is not None and where_filter is None:
+                self.ensure_cache_warm()
+                formatted = self._memory_index.search(query_embedding, n_results)
+                logger.info(f"Found {len(formatted)} relevant chunks (in-memory cache)")
+                return formatted
+            
+            if self._quantized_index is not None and where_filter is None:
+                formatted = self._quantized_query(query_embedding, n_results)
+                logger.info(f"Found {len(formatted)} relevant chunks (int8 first pass)")
+                return formatted
+            
             results = self.collection.query(
-                query_texts=[query_text],
-                n_results=min(n_results, self.collection.count()),
-                where=where_filter
+                query_embeddings=[query_embedding],
+                n_results=min(n_results, count),
+                where=where_filter,
+                include=_QUERY_INCLUDE
             )
             
-            # Format results
-            formatted = []
-            if results["documents"] and results["documents"][0]:
-                for i, doc in enumerate(results["documents"][0]):
-                    formatted.append({
-                        "text": doc,
-                        "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                        "distance": results["distances"][0][i] if results["distances"] else None
-                    })
+            formatted = _format_query_results(results, 0)
             
             logger.info(f"Found {len(formatted)} relevant chunks")
             return formatted
@@ -187,6 +329,151 @@ class VectorStore:
             logger.error(f"Query failed: {e}")
             return []  # Return empty rather than raise for robustness
     
+    def query_batch(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        filter_doc_id: Optional[str] = None
+    ) -> List[List[Dict]]:
+        """
+        Query the vector store for several queries at once.
+        
+        All queries are embedded in a single batched forward pass and, when
+        served by Chroma, searched in a single collection.query call.
+        
+        Args:
+            queries: Search queries
+            n_results: Number of results to return per query
+            filter_doc_id: Optional filter to search within a specific document
+            
+        Returns:
+            One result list per query, each in the same format as query()
+        """
+        if not queries:
+            return []
+        
+        logger.info(f"Querying vector store with {len(queries)} queries")
+        
+        where_filter = None
+        if filter_doc_id:
+            where_filter = {"doc_id": filter_doc_id}
+        
+        try:
+            count = self.collection.count()
+            if count == 0:
+                logger.info("Collection is empty, returning no results")
+                return [[] for _ in queries]
+            
+            embeddings = np.asarray(self.embedding_fn(list(queries)), dtype=np.float32)
+            
+            if self._memory_index is not None and where_filter is None:
+                self.ensure_cache_warm()
+                return [self._memory_index.search(e, n_results) for e in embeddings]
+            
+            if self._quantized_index is not None and where_filter is None:
+                return [self._quantized_query(e, n_results) for e in embeddings]
+            
+            results = self.collection.query(
+                query_embeddings=embeddings,
+                n_results=min(n_results, count),
+                where=where_filter,
+                include=_QUERY_INCLUDE
+            )
+            return [_format_query_results(results, i) for i in range(len(queries))]
+            
+        except Exception as e:
+            logger.error(f"Batch query failed: {e}")
+            return [[] for _ in queries]  # Return empty rather than raise for robustness
+    
+    def _quantized_query(self, query_embedding: List[float], n_results: int) -> List[Dict]:
+        """
+        Two-stage search: int8 scan for candidates, then exact cosine rerank.
+        
+        Args:
+            query_embedding: Query vector
+            n_results: Number of results to return
+            
+        Returns:
+            Results in the same format as query()
+        """
+        self._ensure_quantized_index()
+        
+        candidate_ids = self._quantized_index.search(
+            query_embedding, n_results * settings.QUANTIZED_RERANK_FACTOR
+        )
+        if not candidate_ids:
+            return []
+        
+        candidates = self.collection.get(
+            ids=candidate_ids,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        
+        # Rerank the shortlist against the original fp32 vectors
+        query = np.asarray(query_embedding, dtype=np.float32)
+        vectors = np.asarray(candidates["embeddings"], dtype=np.float32)
+        similarities = (vectors @ query) / np.maximum(
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query), 1e-12
+        )
+        return [
+            {
+                "text": candidates["documents"][i],
+                "metadata": candidates["metadatas"][i] if candidates["metadatas"] else {},
+                "distance": float(1.0 - similarities[i])  # Cosine distance, as in HNSW
+            }
+            for i in top_k(similarities, n_results)
+        ]
+    
+    def _ensure_quantized_index(self):
+        """Build the int8 index from the collection if it isn't built yet."""
+        with self._quantized_index_lock:
+            if self._quantized_index.is_built:
+                return
+            existing = self.collection.get(include=["embeddings"])
+            self._quantized_index.build(existing["ids"], existing["embeddings"])
+    
+    def ensure_cache_warm(self):
+        """Load the whole collection into the in-memory cache if it isn't loaded yet."""
+        if self._memory_index is None:
+            return
+        with self._memory_index_lock:
+            if self._memory_index.is_built:
+                return
+            existing = self.collection.get(include=["embeddings", "documents", "metadatas"])
+            self._memory_index.build(
+                existing["ids"],
+                existing["embeddings"],
+                existing["documents"],
+                existing["metadatas"]
+            )
+    
+    def _reset_indexes(self):
+        """Drop the in-memory indexes so they are rebuilt from the collection on next use."""
+        if self._quantized_index is not None:
+            with self._quantized_index_lock:
+                self._quantized_index.clear()
+        if self._memory_index is not None:
+            with self._memory_index_lock:
+                self._memory_index.clear()
+    
+    def get_performance_stats(self) -> Dict[str, Any]:
+        """
+        Get query embedding cache statistics.
+        
+        Returns:
+            Dictionary with cache hits, misses, size, and hit rate
+        """
+        info = _cached_embed_query.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "query_cache_hits": info.hits,
+            "query_cache_misses": info.misses,
+            "query_cache_size": info.currsize,
+            "query_cache_max_size": info.maxsize,
+            "query_cache_hit_rate": info.hits / lookups if lookups else 0.0,
+            "embedding_model": self.embedding_key
+        }
+    
     def get_document_chunks(self, doc_id: str) -> List[Dict]:
         """
         Retrieve all chunks for a specific document.
@@ -197,24 +484,46 @@ class VectorStore:
         Returns:
             List of chunk dictionaries
         """
-        try:
-            results = self.collection.get(
-                where={"doc_id": doc_id}
-            )
+        return list(self.iter_document_chunks(doc_id))
+    
+    def iter_document_chunks(self, doc_id: str, page_size: int = 256) -> Iterator[Dict]:
+        """
+        Iterate over a document's chunks, fetching them a page at a time.
+        
+        Only one page of chunks is held in memory, and embeddings are
+        never fetched.
+        
+        Args:
+            doc_id: Document identifier
+            page_size: Number of chunks fetched per request
             
-            formatted = []
-            if results["documents"]:
-                for i, doc in enumerate(results["documents"]):
-                    formatted.append({
-                        "text": doc,
-                        "metadata": results["metadatas"][i] if results["metadatas"] else {}
-                    })
+        Yields:
+            Chunk dictionaries (text, metadata)
+        """
+        offset = 0
+        while True:
+            try:
+                results = self.collection.get(
+                    where={"doc_id": doc_id},
+                    include=["documents", "metadatas"],
+                    limit=page_size,
+                    offset=offset
+                )
+            except Exception as e:
+                logger.error(f"Failed to get document chunks: {e}")
+                raise
             
-            return formatted
+            documents = results["documents"] or []
+            metadatas = results["metadatas"]
+            for i, doc in enumerate(documents):
+                yield {
+                    "text": doc,
+                    "metadata": metadatas[i] if metadatas else {}
+                }
             
-        except Exception as e:
-            logger.error(f"Failed to get document chunks: {e}")
-            raise
+            if len(results["ids"]) < page_size:
+                return
+            offset += page_size
     
     def delete_document(self, doc_id: str) -> bool:
         """
@@ -230,6 +539,7 @@ class VectorStore:
             self.collection.delete(
                 where={"doc_id": doc_id}
             )
+            self._reset_indexes()
             logger.info(f"Deleted document: {doc_id}")
             return True
             
@@ -244,10 +554,11 @@ class VectorStore:
     def clear(self) -> bool:
         """Clear all documents from the collection."""
         try:
-            # Get all IDs and delete them
-            all_items = self.collection.get()
-            if all_items["ids"]:
-                self.collection.delete(ids=all_items["ids"])
+            # Dropping and recreating the collection avoids loading every
+            # chunk into memory just to collect the IDs to delete
+            self.client.delete_collection(self.collection_name)
+            self.collection = self._get_or_create_collection()
+            self._reset_indexes()
             logger.info("Cleared all documents from collection")
             return True
         except Exception as e:
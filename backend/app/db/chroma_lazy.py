@@ -0,0 +1,20 @@
+"""
+Lazy Vector Store Access
+
+Agents import the vector store from here so that ChromaDB and the
+embedding model are only loaded the first time the store is used,
+while every later call is a plain cached lookup.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.db.chroma import VectorStore
+
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> "VectorStore":
+    """Get the vector store singleton, importing ChromaDB on first use."""
+    from app.db.chroma import get_vector_store as _get_vector_store
+    return _get_vector_store()
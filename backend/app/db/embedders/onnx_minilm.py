@@ -0,0 +1,137 @@
+"""
+ONNX Runtime MiniLM Embeddings
+
+CPU-optimized replacement for SentenceTransformerEmbeddingFunction with
+all-MiniLM-L6-v2: the transformer runs in ONNX Runtime with full graph
+optimization and int8 dynamically quantized weights instead of PyTorch.
+
+The model is exported once, ahead of time:
+
+    optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 \\
+        --optimize O3 onnx/all-MiniLM-L6-v2
+
+The export directory must contain model.onnx and tokenizer.json. The
+quantized model (model_quantized.onnx) is created next to it on first use
+if it doesn't exist yet.
+
+Requires onnxruntime and tokenizers (plus onnx to quantize the model).
+"""
+
+import logging
+import os
+from typing import List
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Matches the sentence-transformers config for all-MiniLM-L6-v2
+MAX_SEQ_LENGTH = 256
+
+
+def _resolve_model_path(model_dir: str, quantize: bool) -> str:
+    """
+    Find the ONNX model to load, quantizing it to int8 if needed.
+    
+    Args:
+        model_dir: Directory with the exported model
+        quantize: Use (and create if missing) the int8 quantized model
+    
+    Returns:
+        Path to the .onnx file
+    
+    Raises:
+        FileNotFoundError: If the model hasn't been exported
+    """
+    model_path = os.path.join(model_dir, "model.onnx")
+    quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+    
+    if quantize and os.path.exists(quantized_path):
+        return quantized_path
+    
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(
+            f"No ONNX model in {model_dir}. Export it with: optimum-cli export onnx "
+            f"--model sentence-transformers/all-MiniLM-L6-v2 --optimize O3 {model_dir}"
+        )
+    
+    if not quantize:
+        return model_path
+    
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    logger.info(f"Quantizing {model_path} to int8")
+    quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class OnnxMiniLMEmbeddingFunction(EmbeddingFunction):
+    """
+    Chroma embedding function running all-MiniLM-L6-v2 in ONNX Runtime.
+    
+    Produces the same mean-pooled, L2-normalized sentence embeddings as
+    the Sentence Transformers model.
+    """
+    
+    def __init__(self, model_dir: str, quantize: bool = True, batch_size: int = 32):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        model_path = _resolve_model_path(model_dir, quantize)
+        logger.info(f"Loading ONNX embedding model: {model_path}")
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        
+        self.model_dir = model_dir
+        self.quantize = quantize
+        self.batch_size = batch_size
+    
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings: List[np.ndarray] = []
+        for start in range(0, len(input), self.batch_size):
+            embeddings.extend(self._embed_batch(list(input[start:start + self.batch_size])))
+        return embeddings
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch: tokenize, run the model, mean-pool, normalize."""
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        
+        # First output is last_hidden_state: (batch, tokens, hidden)
+        hidden = self._session.run(None, feeds)[0]
+        
+        # Mean over real tokens only, then L2-normalize
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+    
+    @staticmethod
+    def name() -> str:
+        return "onnx-minilm"
+    
+    def get_config(self) -> dict:
+        return {
+            "model_dir": self.model_dir,
+            "quantize": self.quantize,
+            "batch_size": self.batch_size
+        }
+    
+    @staticmethod
+    def build_from_config(config: dict) -> "OnnxMiniLMEmbeddingFunction":
+        return OnnxMiniLMEmbeddingFunction(**config)
@@ -0,0 +1,146 @@
+"""
+In-Memory Embedding Cache
+
+A full fp32 mirror of the collection (vectors, chunk text, metadata) held
+in one contiguous matrix. For collections up to ~100k chunks a brute-force
+BLAS scan over it is faster than a round-trip through Chroma's persistent
+store, since that cost is dominated by I/O and deserialization.
+
+Rows are L2-normalized when they are added, so cosine similarity for a
+query is a single matrix-vector product.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.db.topk import top_k
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryIndex:
+    """
+    Contiguous fp32 embedding matrix with exact cosine search.
+    
+    Rows live in a buffer that grows by doubling, so appends are amortized
+    O(1) instead of re-copying the whole matrix on every insert.
+    """
+    
+    def __init__(self):
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.is_built = False
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def build(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Sequence[str],
+        metadatas: Sequence[Dict]
+    ):
+        """
+        Replace the cache contents with the given chunks.
+        
+        Args:
+            ids: Chunk IDs
+            embeddings: (N, D) float matrix, aligned with ids
+            documents: Chunk texts, aligned with ids
+            metadatas: Chunk metadata, aligned with ids
+        """
+        with self._lock:
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            self._size = 0
+            self.ids, self.documents, self.metadatas = [], [], []
+            self._append(ids, embeddings, documents, metadatas)
+            self.is_built = True
+        logger.info(f"Warmed in-memory embedding cache with {len(ids)} chunks")
+    
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Sequence[str],
+        metadatas: Sequence[Dict]
+    ):
+        """Append chunks to the cache."""
+        with self._lock:
+            self._append(ids, embeddings, documents, metadatas)
+    
+    def search(self, query: np.ndarray, k: int) -> List[Dict]:
+        """
+        Exact cosine search over all cached chunks.
+        
+        Args:
+            query: Query vector
+            k: Number of results to return
+        
+        Returns:
+            Up to k results (text, metadata, cosine distance), most similar first
+        """
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            size = self._size
+            if size == 0:
+                return []
+            vectors = self._vectors[:size]
+            documents, metadatas = self.documents, self.metadatas
+        
+        similarities = vectors @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        
+        return [
+            {
+                "text": documents[i],
+                "metadata": metadatas[i],
+                "distance": float(1.0 - similarities[i])  # Cosine distance, as in HNSW
+            }
+            for i in top_k(similarities, k)
+        ]
+    
+    def clear(self):
+        """Drop the cache so it is rebuilt on next use."""
+        with self._lock:
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            self._size = 0
+            self.ids, self.documents, self.metadatas = [], [], []
+            self.is_built = False
+    
+    def _append(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Sequence[str],
+        metadatas: Sequence[Dict]
+    ):
+        """Append rows, growing the buffer if needed. Caller holds the lock."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        count = len(ids)
+        if count == 0:
+            return
+        
+        needed = self._size + count
+        if needed > len(self._vectors) or self._vectors.shape[1] != embeddings.shape[1]:
+            capacity = max(needed, 2 * len(self._vectors), 1024)
+            vectors = np.empty((capacity, embeddings.shape[1]), dtype=np.float32)
+            if self._size:
+                vectors[:self._size] = self._vectors[:self._size]
+            self._vectors = vectors
+        
+        rows = self._vectors[self._size:needed]
+        rows[:] = embeddings
+        rows /= np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+        
+        # Replace rather than extend, so a concurrent search keeps a consistent snapshot
+        self.ids = self.ids + list(ids)
+        self.documents = self.documents + list(documents)
+        self.metadatas = self.metadatas + list(metadatas)
+        self._size = needed
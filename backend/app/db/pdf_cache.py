@@ -0,0 +1,142 @@
+"""
+Parsed PDF Cache
+
+Keeps what PDFParser.download_and_parse produces for each PDF (summary
+text, chunks, character count) in a SQLite file under PDF_CACHE_DIR, keyed
+by a BLAKE2b hash of the PDF bytes and the parser settings. Papers that
+come up again in later sessions, or after a restart, skip PyMuPDF
+extraction and chunking.
+
+Text and chunks are stored zlib-compressed; the cache is best-effort, so a
+database error is logged and the PDF is parsed as usual.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parsed_pdfs (
+    hash TEXT PRIMARY KEY,
+    text_for_summary BLOB NOT NULL,
+    chunks BLOB,
+    num_characters INTEGER NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+# Parsed text compresses ~3x at level 1; higher levels barely help
+_COMPRESSION_LEVEL = 1
+
+
+class ParsedPDFCache:
+    """
+    SQLite store of parsed PDFs.
+    
+    Used from the worker threads download_and_parse runs parsing in, so
+    the one connection is shared under a lock.
+    """
+    
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, "parsed_pdfs.sqlite3")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (called with the lock held)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL lets several server workers read while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+            logger.info(f"Parsed PDF cache: {self.path}")
+        return self._conn
+    
+    def get(self, key: str, need_chunks: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Look up a parsed PDF.
+        
+        Args:
+            key: Content hash from PDFParser.cache_key
+            need_chunks: Treat entries stored without chunks as a miss
+        
+        Returns:
+            text_for_summary, chunks (empty if not stored) and num_characters,
+            or None on a miss
+        """
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT text_for_summary, chunks, num_characters FROM parsed_pdfs WHERE hash = ?",
+                    (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Parsed PDF cache read failed: {e}")
+            return None
+        
+        if row is None:
+            return None
+        text_blob, chunks_blob, num_characters = row
+        if chunks_blob is None and need_chunks:
+            return None
+        
+        return {
+            "text_for_summary": zlib.decompress(text_blob).decode("utf-8"),
+            "chunks": orjson.loads(zlib.decompress(chunks_blob)) if chunks_blob is not None else [],
+            "num_characters": num_characters
+        }
+    
+    def put(
+        self,
+        key: str,
+        text_for_summary: str,
+        chunks: Optional[List[str]],
+        num_characters: int
+    ):
+        """
+        Store a parsed PDF, replacing any earlier entry for the key.
+        
+        Args:
+            key: Content hash from PDFParser.cache_key
+            text_for_summary: Truncated text for summarization
+            chunks: Text chunks, or None if the PDF wasn't chunked
+            num_characters: Total character count
+        """
+        text_blob = zlib.compress(text_for_summary.encode("utf-8"), _COMPRESSION_LEVEL)
+        chunks_blob = zlib.compress(orjson.dumps(chunks), _COMPRESSION_LEVEL) if chunks is not None else None
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO parsed_pdfs VALUES (?, ?, ?, ?, ?)",
+                    (key, text_blob, chunks_blob, num_characters, time.time())
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Parsed PDF cache write failed: {e}")
+    
+    def close(self):
+        """Close the database connection, if it was opened."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global instance (None when PDF_CACHE_ENABLED is off)
+parsed_pdf_cache: Optional[ParsedPDFCache] = (
+    ParsedPDFCache(settings.PDF_CACHE_DIR) if settings.PDF_CACHE_ENABLED else None
+)
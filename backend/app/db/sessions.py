@@ -0,0 +1,161 @@
+"""
+Research Session Storage
+
+Sessions live in process memory by default, capped at
+SESSION_MEMORY_MAX_ENTRIES and expired after SESSION_TTL_SECONDS. With
+REDIS_URL set they are stored in Redis as msgpack, so they survive
+restarts and are shared by every worker behind a load balancer. Redis reads
+are not cached in the worker, since another worker may have saved the
+session since.
+
+redis and msgpack are only imported when REDIS_URL is set.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from app.agents.state import DocumentInfo
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# msgpack extension type codes for state values that aren't plain data
+_EXT_DOCUMENT = 1
+_EXT_SET = 2
+
+
+def _encode_default(value: Any):
+    """msgpack fallback for DocumentInfo and set values in the state."""
+    import msgpack
+    
+    if isinstance(value, DocumentInfo):
+        return msgpack.ExtType(_EXT_DOCUMENT, msgpack.packb(value.to_dict()))
+    if isinstance(value, (set, frozenset)):
+        return msgpack.ExtType(_EXT_SET, msgpack.packb(list(value)))
+    raise TypeError(f"Cannot serialize {type(value).__name__} in session state")
+
+
+def _decode_ext(code: int, data: bytes):
+    import msgpack
+    
+    if code == _EXT_DOCUMENT:
+        return DocumentInfo.from_dict(msgpack.unpackb(data))
+    if code == _EXT_SET:
+        return set(msgpack.unpackb(data))
+    return msgpack.ExtType(code, data)
+
+
+def encode_session(state: Dict[str, Any]) -> bytes:
+    """Serialize a session state to msgpack."""
+    import msgpack
+    return msgpack.packb(state, default=_encode_default)
+
+
+def decode_session(data: bytes) -> Dict[str, Any]:
+    """Deserialize a session state produced by encode_session."""
+    import msgpack
+    return msgpack.unpackb(data, ext_hook=_decode_ext)
+
+
+class SessionStore:
+    """
+    Async key-value store for research session state.
+    
+    Reads in memory mode return the stored object itself, as the plain
+    dicts this replaces did. With Redis every read decodes a fresh copy, so
+    changes must be written back with save().
+    """
+    
+    def __init__(self, namespace: str):
+        """
+        Args:
+            namespace: Key prefix separating this store's sessions in Redis
+        """
+        self.namespace = namespace
+        self._redis = None
+        # Bounded like Redis: finished sessions expire instead of piling up
+        self._memory: TTLCache = TTLCache(
+            maxsize=settings.SESSION_MEMORY_MAX_ENTRIES,
+            ttl=settings.SESSION_TTL_SECONDS
+        )
+    
+    @property
+    def uses_redis(self) -> bool:
+        return bool(settings.REDIS_URL)
+    
+    def _get_redis(self):
+        """Create the Redis client on first use (binds to the running loop)."""
+        if self._redis is None:
+            import redis.asyncio as redis
+            
+            self._redis = redis.from_url(settings.REDIS_URL)
+            logger.info(f"Storing '{self.namespace}' sessions in Redis")
+        return self._redis
+    
+    def _key(self, session_id: str) -> str:
+        return f"sf:{self.namespace}:{session_id}"
+    
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a session, or None if it doesn't exist (or has expired)."""
+        if not self.uses_redis:
+            return self._memory.get(session_id)
+        
+        data = await self._get_redis().get(self._key(session_id))
+        if data is None:
+            return None
+        return decode_session(data)
+    
+    async def save(self, session_id: str, state: Dict[str, Any]):
+        """Store a session, replacing any previous state (expires after SESSION_TTL_SECONDS)."""
+        if not self.uses_redis:
+            self._memory[session_id] = state
+            return
+        
+        await self._get_redis().set(
+            self._key(session_id),
+            encode_session(state),
+            ex=settings.SESSION_TTL_SECONDS
+        )
+    
+    async def delete(self, session_id: str) -> bool:
+        """
+        Delete a session.
+        
+        Returns:
+            True if the session existed
+        """
+        if not self.uses_redis:
+            return self._memory.pop(session_id, None) is not None
+        
+        return bool(await self._get_redis().delete(self._key(session_id)))
+    
+    async def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """All stored sessions as (session_id, state) pairs."""
+        if not self.uses_redis:
+            return list(self._memory.items())
+        
+        client = self._get_redis()
+        prefix = self._key("")
+        keys = [key async for key in client.scan_iter(match=f"{prefix}*")]
+        if not keys:
+            return []
+        
+        values = await client.mget(keys)
+        return [
+            (key.decode()[len(prefix):], decode_session(data))
+            for key, data in zip(keys, values)
+            if data is not None
+        ]
+    
+    async def close(self):
+        """Close the Redis connection pool, if one was opened."""
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+# REST (stepped) and WebSocket research sessions
+research_sessions = SessionStore("sess")
+ws_sessions = SessionStore("ws")
@@ -0,0 +1,31 @@
+"""
+Top-k Selection
+
+Shared by the in-memory vector indexes: selecting the k best scores with
+argpartition is O(N), and only those k are sorted, instead of an
+O(N log N) argsort over every score.
+"""
+
+import numpy as np
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, highest first.
+    
+    Args:
+        scores: 1-D array of similarity scores
+        k: Number of indices to return (capped at len(scores))
+        
+    Returns:
+        Up to k indices into scores, ordered by descending score
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
@@ -0,0 +1,169 @@
+"""
+LLM Response Cache
+
+Avoids re-paying OpenRouter latency and tokens for work we've already done:
+- Exact-match cache keyed by SHA-256 of (model, system prompt, prompt)
+- Content-addressed cache for immutable inputs (e.g. ArXiv paper summaries)
+
+Both caches are in-process TTL caches, so they survive across research
+sessions for as long as the server is running.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import AsyncIterator, Optional
+
+from cachetools import TTLCache
+
+from app.config import settings
+from app.llm.client import acompletion, get_model_name, stream_completion
+
+logger = logging.getLogger(__name__)
+
+
+# Planner/writer prompts: identical queries within a day reuse the response
+_response_cache: TTLCache = TTLCache(
+    maxsize=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl=settings.LLM_CACHE_TTL_SECONDS
+)
+
+# Keyed on immutable content (e.g. arxiv_id + prompt version), so it can live longer
+_content_cache: TTLCache = TTLCache(
+    maxsize=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl=settings.LLM_CONTENT_CACHE_TTL_SECONDS
+)
+
+# cachetools caches are not thread-safe; held briefly around every lookup/store
+_cache_lock = threading.Lock()
+
+
+def make_prompt_key(model: str, system_prompt: Optional[str], prompt: str) -> str:
+    """Build an exact-match cache key for a prompt."""
+    digest = hashlib.sha256()
+    for part in (model, system_prompt or "", prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def get_cached_content(model_type: str, cache_key: str) -> Optional[str]:
+    """Look up a content-addressed completion without calling the LLM."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        return _content_cache.get(f"{get_model_name(model_type)}:{cache_key}")
+
+
+def set_cached_content(model_type: str, cache_key: str, value: str):
+    """Store a content-addressed completion produced outside acached_completion."""
+    if settings.LLM_CACHE_ENABLED and value:
+        with _cache_lock:
+            _content_cache[f"{get_model_name(model_type)}:{cache_key}"] = value
+
+
+async def acached_completion(
+    prompt: str,
+    model_type: str = "fast",
+    system_prompt: str = None,
+    cache_key: str = None,
+    cache_system_prompt: bool = False
+) -> str:
+    """
+    Get a completion, serving repeated requests from the cache.
+    
+    Args:
+        prompt: The user prompt to send
+        model_type: "smart" for planning/synthesis, "fast" for summarization
+        system_prompt: Optional system prompt for the conversation
+        cache_key: Optional key identifying immutable input (e.g. an ArXiv ID).
+            When given, the completion is cached by this key instead of the
+            prompt hash, and kept for LLM_CONTENT_CACHE_TTL_SECONDS.
+        cache_system_prompt: Mark the system prompt as a cacheable prefix
+            for the provider (see acompletion())
+        
+    Returns:
+        The completion text
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return await acompletion(
+            prompt, model_type, system_prompt,
+            cache_system_prompt=cache_system_prompt
+        )
+    
+    model = get_model_name(model_type)
+    
+    if cache_key:
+        cache = _content_cache
+        key = f"{model}:{cache_key}"
+    else:
+        cache = _response_cache
+        key = make_prompt_key(model, system_prompt, prompt)
+    
+    with _cache_lock:
+        cached = cache.get(key)
+    
+    if cached is not None:
+        logger.info(f"LLM cache hit for model: {model}")
+        return cached
+    
+    result = await acompletion(
+        prompt, model_type, system_prompt,
+        cache_system_prompt=cache_system_prompt
+    )
+    
+    # Don't cache empty responses, the next call may succeed
+    if result:
+        with _cache_lock:
+            cache[key] = result
+    
+    return result
+
+
+async def cached_stream_completion(
+    prompt: str,
+    model_type: str = "fast",
+    system_prompt: str = None,
+    cache_system_prompt: bool = False
+) -> AsyncIterator[str]:
+    """
+    Stream a completion, serving repeated requests from the cache.
+    
+    Shares the prompt cache with acached_completion. A cache hit yields the
+    whole response as a single chunk; a miss streams from OpenRouter and
+    caches the response once it has been received in full.
+    
+    Args:
+        prompt: The user prompt to send
+        model_type: "smart" for planning/synthesis, "fast" for summarization
+        system_prompt: Optional system prompt for the conversation
+        cache_system_prompt: Mark the system prompt as a cacheable prefix
+            for the provider (see acompletion())
+        
+    Yields:
+        Text chunks of the completion, in order
+    """
+    model = get_model_name(model_type)
+    key = make_prompt_key(model, system_prompt, prompt)
+    
+    if settings.LLM_CACHE_ENABLED:
+        with _cache_lock:
+            cached = _response_cache.get(key)
+        if cached is not None:
+            logger.info(f"LLM cache hit for model: {model}")
+            yield cached
+            return
+    
+    parts = []
+    async for chunk in stream_completion(
+        prompt, model_type, system_prompt,
+        cache_system_prompt=cache_system_prompt
+    ):
+        parts.append(chunk)
+        yield chunk
+    
+    result = "".join(parts)
+    if settings.LLM_CACHE_ENABLED and result:
+        with _cache_lock:
+            _response_cache[key] = result
+
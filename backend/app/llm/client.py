@@ -7,101 +7,253 @@ Provides a unified interface to OpenRouter API with support for:
 - Streaming responses
 """
 
-from openai import OpenAI
-from typing import Generator, Union
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from functools import lru_cache
+from typing import Any, AsyncIterator, List, Union
 import logging
+import re
 
-from app.config import llm_config
+import httpx
+import orjson
+
+from app.config import llm_config, settings
 
 logger = logging.getLogger(__name__)
 
+# Markdown code fences (```json ... ```) that models wrap JSON answers in
+_FENCE_RE = re.compile(r"```[a-zA-Z]*\n?")
+
+# One connection pool shared by every completion call (owned by the client
+# from get_async_llm_client). Keep-alive avoids a fresh TLS handshake per
+# request and HTTP/2 multiplexes the concurrent researcher calls onto a
+# single connection to OpenRouter.
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_EXTRA_HEADERS = {
+    "HTTP-Referer": "http://localhost:3000",
+    "X-Title": "ScholarFlow"
+}
 
-def get_llm_client() -> OpenAI:
-    """Create an OpenAI client configured for OpenRouter."""
+
+@lru_cache(maxsize=1)
+def get_async_llm_client() -> AsyncOpenAI:
+    """Get the async OpenAI client configured for OpenRouter (created once)."""
     if not llm_config.API_KEY:
         raise ValueError(
             "OPENROUTER_API_KEY not set. Please set it in your .env file."
         )
     
-    return OpenAI(
+    return AsyncOpenAI(
         base_url=llm_config.BASE_URL,
-        api_key=llm_config.API_KEY
+        api_key=llm_config.API_KEY,
+        http_client=DefaultAsyncHttpxClient(http2=True, limits=_HTTP_LIMITS),
     )
 
 
-def completion(
+async def close_llm_client():
+    """Close the OpenRouter client and its connection pool, if it was created."""
+    if get_async_llm_client.cache_info().currsize:
+        await get_async_llm_client().close()
+        get_async_llm_client.cache_clear()
+
+
+def get_model_name(model_type: str) -> str:
+    """Resolve a model type ("smart" or "fast") to the configured model name."""
+    if model_type == "smart":
+        return llm_config.SMART_MODEL
+    return llm_config.FAST_MODEL
+
+
+BATCH_SUMMARY_PROMPT = """You are an expert academic summarizer. Summarize each of the following research paper excerpts in 3-4 sentences.
+
+For each paper, focus on:
+- The main research question or problem
+- The methodology or approach used
+- Key findings or contributions
+- Practical implications (if any)
+
+{papers}
+
+Return ONLY a valid JSON object mapping each paper ID to its summary, e.g. {{"<paper id>": "<summary>"}}. No other text."""
+
+
+def parse_json_response(response: str) -> Any:
+    """
+    Parse a JSON answer from the model, ignoring markdown code fences.
+    
+    Raises:
+        orjson.JSONDecodeError: If the response is not valid JSON
+    """
+    return orjson.loads(_FENCE_RE.sub("", response).strip())
+
+
+async def abatch_summarize(
+    papers_text: List[str],
+    arxiv_ids: List[str],
+    max_chars: int = None
+) -> List[str]:
+    """
+    Summarize several papers with a single completion request.
+    
+    One request per question instead of one per paper saves a network
+    round-trip and queueing delay for every additional paper.
+    
+    Args:
+        papers_text: Text of each paper to summarize
+        arxiv_ids: ArXiv ID of each paper (used as keys in the response)
+        max_chars: Maximum characters to include per paper
+        
+    Returns:
+        Summaries aligned with the input; empty string for any paper
+        missing from the model's response
+    """
+    prompt = _batch_summary_prompt(papers_text, arxiv_ids, max_chars)
+    response = await acompletion(prompt=prompt, model_type="fast")
+    return _parse_batch_summaries(response, arxiv_ids)
+
+
+def _batch_summary_prompt(papers_text: List[str], arxiv_ids: List[str], max_chars: int = None) -> str:
+    """Build the prompt asking for one summary per paper."""
+    max_chars = max_chars or settings.MAX_CONTEXT_CHARS
+    
+    sections = []
+    for arxiv_id, text in zip(arxiv_ids, papers_text):
+        truncated = text[:max_chars]
+        if len(text) > max_chars:
+            truncated += "\n\n[Text truncated for length]"
+        sections.append(f"Paper ID: {arxiv_id}\n---\n{truncated}\n---")
+    
+    return BATCH_SUMMARY_PROMPT.format(papers="\n\n".join(sections))
+
+
+def _parse_batch_summaries(response: str, arxiv_ids: List[str]) -> List[str]:
+    """Align the model's {arxiv_id: summary} answer with the requested papers."""
+    summaries = parse_json_response(response)
+    if not isinstance(summaries, dict):
+        raise ValueError("Batch summary response must be a JSON object")
+    
+    return [str(summaries.get(arxiv_id) or "") for arxiv_id in arxiv_ids]
+
+
+def _build_messages(prompt: str, system_prompt: str, cache_system_prompt: bool) -> List[dict]:
+    """Build the chat messages for a prompt and optional system prompt."""
+    messages = []
+    if system_prompt:
+        messages.append({
+            "role": "system",
+            "content": _system_content(system_prompt, cache_system_prompt)
+        })
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _system_content(system_prompt: str, cache_system_prompt: bool) -> Union[str, List[dict]]:
+    """
+    Build the system message content.
+    
+    Providers cache prompt prefixes, so static instructions belong in the
+    system prompt and per-request data in the user message. Anthropic-style
+    models additionally need an explicit cache_control breakpoint.
+    """
+    if not (cache_system_prompt and llm_config.PROMPT_CACHE_CONTROL):
+        return system_prompt
+    
+    return [{
+        "type": "text",
+        "text": system_prompt,
+        "cache_control": {"type": "ephemeral"}
+    }]
+
+
+def _log_cached_tokens(response):
+    """Log how many prompt tokens were served from the provider's prefix cache."""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if cached_tokens:
+        logger.info(f"Prompt cache hit: {cached_tokens}/{usage.prompt_tokens} prompt tokens cached")
+
+
+async def _astream_response(response) -> AsyncIterator[str]:
+    """Async generator that yields chunks from an async streaming response."""
+    async for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def stream_completion(
+    prompt: str,
+    model_type: str = "fast",
+    system_prompt: str = None,
+    cache_system_prompt: bool = False
+) -> AsyncIterator[str]:
+    """
+    Stream a completion from OpenRouter without blocking the event loop.
+    
+    Args:
+        prompt: The user prompt to send
+        model_type: "smart" for planning/synthesis, "fast" for summarization
+        system_prompt: Optional system prompt for the conversation
+        cache_system_prompt: Mark the system prompt as a cacheable prefix
+            for the provider (see acompletion())
+        
+    Yields:
+        Text chunks of the completion, in order
+    """
+    stream = await acompletion(
+        prompt, model_type, system_prompt,
+        stream=True, cache_system_prompt=cache_system_prompt
+    )
+    async for chunk in stream:
+        yield chunk
+
+
+async def acompletion(
     prompt: str,
     model_type: str = "fast",
     system_prompt: str = None,
-    stream: bool = False
-) -> Union[str, Generator]:
+    stream: bool = False,
+    cache_system_prompt: bool = False
+) -> Union[str, AsyncIterator[str]]:
     """
     Get a completion from OpenRouter.
     
+    Uses the async OpenAI client, so concurrent requests overlap on the
+    connection pool instead of each blocking the event loop (or a worker
+    thread) until OpenRouter answers.
+    
     Args:
         prompt: The user prompt to send
         model_type: "smart" for planning/synthesis, "fast" for summarization
         system_prompt: Optional system prompt for the conversation
-        stream: If True, returns a generator for streaming responses
+        stream: If True, returns an async iterator over the response chunks
+        cache_system_prompt: If True, mark the system prompt as a cacheable
+            prefix (only sent when PROMPT_CACHE_CONTROL is enabled)
         
     Returns:
-        The completion text, or a generator if streaming
+        The completion text, or an async iterator if streaming
     """
-    client = get_llm_client()
-    
-    # Select model based on type
-    if model_type == "smart":
-        model = llm_config.SMART_MODEL
-    else:
-        model = llm_config.FAST_MODEL
+    client = get_async_llm_client()
+    model = get_model_name(model_type)
     
     logger.info(f"Calling OpenRouter with model: {model}")
     
-    # Build messages
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
+    messages = _build_messages(prompt, system_prompt, cache_system_prompt)
     
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
             messages=messages,
             stream=stream,
-            extra_headers={
-                "HTTP-Referer": "http://localhost:3000",
-                "X-Title": "ScholarFlow"
-            }
+            extra_headers=_EXTRA_HEADERS
         )
         
         if stream:
-            return _stream_response(response)
+            return _astream_response(response)
         
+        _log_cached_tokens(response)
         return response.choices[0].message.content
         
     except Exception as e:
         logger.error(f"OpenRouter API error: {e}")
         raise
-
-
-def _stream_response(response) -> Generator[str, None, None]:
-    """Generator that yields chunks from streaming response."""
-    for chunk in response:
-        if chunk.choices and chunk.choices[0].delta.content:
-            yield chunk.choices[0].delta.content
-
-
-async def acompletion(
-    prompt: str,
-    model_type: str = "fast",
-    system_prompt: str = None
-) -> str:
-    """
-    Async version of completion for use in FastAPI endpoints.
-    
-    Note: The openai library handles async internally, but we wrap it
-    for consistency with our async agent architecture.
-    """
-    # For now, we use the sync version
-    # The openai library's async support can be added if needed
-    return completion(prompt, model_type, system_prompt, stream=False)
@@ -5,13 +5,49 @@ FastAPI application entry point for the ScholarFlow Agentic RAG system.
 """
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 import logging
+import multiprocessing
+import os
 
-from app.routers import research
-from app.routers import websocket
 from app.config import llm_config, settings
 
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (respects container CPU affinity)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def configure_performance_environment():
+    """
+    Let the embedding libraries use every available core.
+    
+    OpenMP/MKL (used by PyTorch and NumPy) read their thread counts when
+    they load, so this must run before anything imports them. Explicit
+    environment settings win. Skipped in LIGHTWEIGHT_MODE, where extra
+    threads would only oversubscribe a small shared CPU.
+    """
+    if settings.LIGHTWEIGHT_MODE:
+        return
+    
+    threads = str(settings.EMBEDDING_THREADS or _available_cpus())
+    os.environ.setdefault("OMP_NUM_THREADS", threads)
+    os.environ.setdefault("MKL_NUM_THREADS", threads)
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+
+# Must run before the routers pull in the agents and their numeric libraries
+configure_performance_environment()
+
+from app.agents.graph import get_research_graph  # noqa: E402
+from app.routers import research  # noqa: E402
+from app.routers import websocket  # noqa: E402
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,6 +56,11 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+# Worker processes rendering report PDFs
+PDF_RENDER_WORKERS = 1 if settings.LIGHTWEIGHT_MODE else 2
+
+
 # Create FastAPI app
 app = FastAPI(
     title="ScholarFlow API",
@@ -44,7 +85,9 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # Encode JSON responses (session state, document lists) with orjson
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -116,17 +159,31 @@ async def startup_event():
     logger.info("=" * 50)
     logger.info("ScholarFlow API Starting")
     logger.info("=" * 50)
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
     logger.info(f"Smart Model: {llm_config.SMART_MODEL}")
     logger.info(f"Fast Model: {llm_config.FAST_MODEL}")
     
     # Memory optimization settings
     logger.info(f"Lightweight Mode: {settings.LIGHTWEIGHT_MODE}")
     logger.info(f"Skip Vector Store: {settings.SKIP_VECTOR_STORE}")
+    logger.info(f"Embedding threads: {os.environ.get('OMP_NUM_THREADS', 'library default')}")
+    logger.info(f"Session storage: {'Redis' if settings.REDIS_URL else 'in-memory'}")
     
     if settings.SKIP_VECTOR_STORE:
         logger.info("  → Vector storage DISABLED (saves ~200MB RAM)")
         logger.info("  → Papers will be summarized but not stored in ChromaDB")
     
+    # Compile the LangGraph workflow now rather than on the first request
+    app.state.research_graph = get_research_graph()
+    logger.info(" Research graph compiled")
+    
+    # Report PDFs are rendered in worker processes so a render never blocks
+    # the event loop (processes start on the first download)
+    app.state.pdf_pool = ProcessPoolExecutor(
+        max_workers=PDF_RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    
     if not llm_config.API_KEY:
         logger.warning("  OPENROUTER_API_KEY not set! API calls will fail.")
     else:
@@ -139,3 +196,34 @@ async def startup_event():
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("ScholarFlow API Shutting Down")
+    
+    from app.db.sessions import research_sessions, ws_sessions
+    await research_sessions.close()
+    await ws_sessions.close()
+    
+    from app.llm.client import close_llm_client
+    from app.tools.http_client import close_http_client
+    from app.tools.pdf_parser import shutdown_extract_pool
+    await close_llm_client()
+    await close_http_client()
+    shutdown_extract_pool()
+    
+    from app.db.pdf_cache import parsed_pdf_cache
+    if parsed_pdf_cache is not None:
+        parsed_pdf_cache.close()
+    app.state.pdf_pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    # "auto" selects uvloop/httptools (installed with uvicorn[standard] on
+    # Linux/macOS) and falls back to asyncio/h11 where they are unavailable
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", "8000")),
+        loop="auto",
+        http="auto",
+        ws="websockets"
+    )
@@ -9,22 +9,24 @@ Provides REST API for the ScholarFlow research workflow:
 Note: For real-time updates, use the WebSocket endpoint at /ws/research
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, List, Any
 import uuid
 import logging
 
-from app.agents.state import ResearchState, create_initial_state
-from app.agents.graph import get_research_graph
+from app.agents.researcher import cancel_prefetch
+from app.agents.state import create_initial_state
+from app.db.sessions import research_sessions as sessions
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# In-memory session storage
-# Note: In production, use Redis or a database
-sessions: Dict[str, ResearchState] = {}
+
+def _get_graph(http_request: Request):
+    """The research graph compiled once at startup (see main.startup_event)."""
+    return http_request.app.state.research_graph
 
 
 class StartResearchRequest(BaseModel):
@@ -51,7 +53,7 @@ class SessionResponse(BaseModel):
 
 
 @router.post("/research/start")
-async def start_research(request: StartResearchRequest) -> Dict[str, Any]:
+async def start_research(request: StartResearchRequest, http_request: Request) -> Dict[str, Any]:
     """
     Initialize a new research session.
     
@@ -66,14 +68,14 @@ async def start_research(request: StartResearchRequest) -> Dict[str, Any]:
     initial_state = create_initial_state(session_id, request.query)
     
     # Get the research graph
-    graph = get_research_graph()
+    graph = _get_graph(http_request)
     
     try:
         # Run the planning step
-        result = graph.invoke(initial_state)
+        result = await graph.ainvoke(initial_state)
         
         # Store the result
-        sessions[session_id] = result
+        await sessions.save(session_id, result)
         
         logger.info(f"Session {session_id} planned with {len(result.get('plan', []))} questions")
         
@@ -86,11 +88,12 @@ async def start_research(request: StartResearchRequest) -> Dict[str, Any]:
         
     except Exception as e:
         logger.error(f"Failed to start research: {e}")
+        cancel_prefetch(session_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/research/next-step")
-async def next_step(request: NextStepRequest) -> Dict[str, Any]:
+async def next_step(request: NextStepRequest, http_request: Request) -> Dict[str, Any]:
     """
     Trigger the next tick of the research workflow.
     
@@ -99,11 +102,10 @@ async def next_step(request: NextStepRequest) -> Dict[str, Any]:
     """
     session_id = request.session_id
     
-    if session_id not in sessions:
+    state = await sessions.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    state = sessions[session_id]
-    
     # Check if already complete
     if state.get("is_complete", False):
         report = None
@@ -116,17 +118,17 @@ async def next_step(request: NextStepRequest) -> Dict[str, Any]:
             "logs": state.get("logs", []),
             "report": report,
             "documents": [
-                {"title": d["title"], "arxiv_id": d["arxiv_id"], "pdf_url": d["pdf_url"]}
+                {"title": d.title, "arxiv_id": d.arxiv_id, "pdf_url": d.pdf_url}
                 for d in state.get("documents", [])
             ]
         }
     
     # Get the graph and run the next step
-    graph = get_research_graph()
+    graph = _get_graph(http_request)
     
     try:
-        result = graph.invoke(state)
-        sessions[session_id] = result
+        result = await graph.ainvoke(state)
+        await sessions.save(session_id, result)
         
         # Prepare response
         response = {
@@ -137,7 +139,7 @@ async def next_step(request: NextStepRequest) -> Dict[str, Any]:
                 "plan": result.get("plan", []),
                 "current_task_index": result.get("current_task_index", 0),
                 "documents": [
-                    {"title": d["title"], "arxiv_id": d["arxiv_id"]}
+                    {"title": d.title, "arxiv_id": d.arxiv_id}
                     for d in result.get("documents", [])
                 ]
             }
@@ -147,10 +149,15 @@ async def next_step(request: NextStepRequest) -> Dict[str, Any]:
         if result.get("is_complete") and result.get("messages"):
             response["report"] = result["messages"][-1].get("content")
         
+        # Nothing left to prefetch for (the run may reach the writer early)
+        if result.get("is_complete"):
+            cancel_prefetch(session_id)
+        
         return response
         
     except Exception as e:
         logger.error(f"Failed to run next step: {e}")
+        cancel_prefetch(session_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -162,11 +169,10 @@ async def get_session(session_id: str) -> SessionResponse:
     Returns all session data including the plan, documents,
     logs, and final report (if complete).
     """
-    if session_id not in sessions:
+    state = await sessions.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    state = sessions[session_id]
-    
     # Get report if available
     report = None
     if state.get("is_complete") and state.get("messages"):
@@ -177,7 +183,7 @@ async def get_session(session_id: str) -> SessionResponse:
         status=state.get("status", "unknown"),
         plan=state.get("plan", []),
         current_task_index=state.get("current_task_index", 0),
-        documents=state.get("documents", []),
+        documents=[d.to_dict() for d in state.get("documents", [])],
         logs=state.get("logs", []),
         report=report,
         error=state.get("error")
@@ -187,10 +193,10 @@ async def get_session(session_id: str) -> SessionResponse:
 @router.delete("/session/{session_id}")
 async def delete_session(session_id: str) -> Dict[str, str]:
     """Delete a research session."""
-    if session_id not in sessions:
+    cancel_prefetch(session_id)
+    if not await sessions.delete(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del sessions[session_id]
     logger.info(f"Deleted session: {session_id}")
     
     return {"message": "Session deleted", "session_id": session_id}
@@ -199,14 +205,15 @@ async def delete_session(session_id: str) -> Dict[str, str]:
 @router.get("/sessions")
 async def list_sessions() -> Dict[str, Any]:
     """List all active sessions (for debugging)."""
+    stored = await sessions.items()
     return {
-        "count": len(sessions),
+        "count": len(stored),
         "sessions": [
             {
                 "session_id": sid,
                 "status": state.get("status"),
                 "query": state.get("original_query", "")[:50]
             }
-            for sid, state in sessions.items()
+            for sid, state in stored
         ]
     }
@@ -5,44 +5,152 @@ Provides bidirectional communication for streaming research progress.
 Also includes REST endpoints for session retrieval and PDF download.
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.responses import Response
-from typing import Dict, Set
+from pydantic import BaseModel
+from typing import Dict, List, Optional
 import asyncio
 import json
 import logging
 import uuid
 
-from app.agents.state import create_initial_state
-from app.agents.graph import get_research_graph
+import orjson
+from cachetools import LRUCache, TTLCache
+
+from app.agents.researcher import cancel_prefetch
+from app.agents.state import DocumentInfo, create_initial_state
+from app.config import settings
+from app.db.sessions import ws_sessions
 from app.tools.pdf_report import markdown_to_pdf
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Active WebSocket connections per session
-active_connections: Dict[str, Set[WebSocket]] = {}
+# Track if client is still connected
+# Entries are dropped when a run finishes; the TTL catches sockets that
+# disconnected before a run started
+client_connected: TTLCache = TTLCache(
+    maxsize=settings.SESSION_MEMORY_MAX_ENTRIES,
+    ttl=settings.SESSION_TTL_SECONDS
+)
 
-# Session state storage (in-memory, persists as long as server is running)
-ws_sessions: Dict[str, dict] = {}
 
-# Track if client is still connected
-client_connected: Dict[str, bool] = {}
+class DocumentRef(BaseModel):
+    """A document by title and ArXiv ID."""
+    title: str
+    arxiv_id: str
+
+
+class DocumentSummary(DocumentRef):
+    """A document with its PDF link and the start of its summary."""
+    pdf_url: Optional[str] = None
+    summary: str = ""
+    
+    @classmethod
+    def from_document(cls, doc: DocumentInfo) -> "DocumentSummary":
+        return cls(
+            title=doc.title,
+            arxiv_id=doc.arxiv_id,
+            pdf_url=doc.pdf_url,
+            summary=doc.summary[:200]
+        )
+
+
+class ProgressEncoder:
+    """
+    Encodes the "progress" frames sent after each graph node for one session.
+    
+    Frames carry every document found so far, and that list only grows
+    during a run, so each document is encoded once and its JSON reused in
+    every later frame; only the small fields around it are encoded per frame.
+    """
+    
+    def __init__(self):
+        self._documents: List[str] = []
+    
+    def encode(self, node: str, step: int, state: Dict) -> str:
+        """
+        Args:
+            node: Graph node that just finished
+            step: Step number of the node
+            state: Current session state
+        
+        Returns:
+            JSON text of the frame
+        """
+        documents = state.get("documents", [])
+        if len(documents) < len(self._documents):
+            # The list was replaced rather than extended
+            self._documents.clear()
+        for d in documents[len(self._documents):]:
+            self._documents.append(orjson.dumps({"title": d.title, "arxiv_id": d.arxiv_id}).decode())
+        
+        head = orjson.dumps({
+            "type": "progress",
+            "node": node,
+            "step": step,
+            "status": state.get("status", "unknown"),
+            "plan": state.get("plan", []),
+            "current_task_index": state.get("current_task_index", 0)
+        }).decode()
+        logs = orjson.dumps(state.get("logs", [])[-5:]).decode()  # Last 5 logs
+        
+        return f'{head[:-1]},"documents":[{",".join(self._documents)}],"logs":{logs}}}'
+
+
+class CompletedFrame(BaseModel):
+    """WebSocket message sent once the report is written."""
+    type: str = "completed"
+    session_id: str
+    report: Optional[str] = None
+    documents: List[DocumentSummary]
+
+
+class SessionPayload(BaseModel):
+    """Stored session as returned to the frontend (same fields as the WebSocket frames)."""
+    session_id: str
+    status: str
+    plan: List[str]
+    current_task_index: int
+    documents: List[DocumentSummary]
+    report: Optional[str] = None
+    original_query: str = ""
+
+
+# Maximum number of undelivered events buffered per session
+EVENT_QUEUE_MAXSIZE = 1000
 
 
 class ConnectionManager:
-    """Manages WebSocket connections for research sessions."""
+    """
+    Manages WebSocket connections for research sessions.
+    
+    Agents publish events without waiting on the socket: each session gets
+    a queue drained by a single emitter task, so events are delivered in
+    order while a slow client never stalls the research itself.
+    """
     
     def __init__(self):
         self.connections: Dict[str, WebSocket] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._emitters: Dict[str, asyncio.Task] = {}
     
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
+        self.register(websocket, session_id)
+    
+    def register(self, websocket: WebSocket, session_id: str):
+        """Register an already-accepted WebSocket for a session."""
         self.connections[session_id] = websocket
         logger.info(f"WebSocket connected for session: {session_id}")
     
     def disconnect(self, session_id: str):
+        emitter = self._emitters.pop(session_id, None)
+        if emitter is not None:
+            emitter.cancel()
+        self._queues.pop(session_id, None)
+        
         if session_id in self.connections:
             del self.connections[session_id]
             logger.info(f"WebSocket disconnected for session: {session_id}")
@@ -50,18 +158,59 @@ class ConnectionManager:
     async def send(self, session_id: str, message: dict):
         if session_id in self.connections:
             try:
-                await self.connections[session_id].send_json(message)
+                await self.connections[session_id].send_text(orjson.dumps(message).decode())
             except Exception as e:
                 logger.error(f"Failed to send WebSocket message: {e}")
                 self.disconnect(session_id)
+    
+    def publish(self, session_id: str, message: dict):
+        """
+        Queue a message for a session without waiting for it to be sent.
+        
+        Messages for the same session are delivered in publish order.
+        """
+        if session_id not in self.connections:
+            return
+        
+        queue = self._queues.get(session_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=EVENT_QUEUE_MAXSIZE)
+            self._queues[session_id] = queue
+            self._emitters[session_id] = asyncio.create_task(
+                self._drain(session_id, queue)
+            )
+        
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning(f"Event queue full for session {session_id}, dropping event")
+    
+    async def flush(self, session_id: str, timeout: float = 5.0):
+        """Wait until queued messages for a session have been sent."""
+        queue = self._queues.get(session_id)
+        if queue is None:
+            return
+        try:
+            await asyncio.wait_for(queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out flushing events for session {session_id}")
+    
+    async def _drain(self, session_id: str, queue: asyncio.Queue):
+        """Emitter task: send queued messages one at a time."""
+        while True:
+            message = await queue.get()
+            try:
+                await self.send(session_id, message)
+            finally:
+                queue.task_done()
 
 
 manager = ConnectionManager()
 
 
-async def safe_send(websocket: WebSocket, session_id: str, message: dict) -> bool:
+async def safe_send_text(websocket: WebSocket, session_id: str, text: str) -> bool:
     """
-    Safely send a message via WebSocket.
+    Safely send an already-encoded JSON message via WebSocket.
     Returns True if sent successfully, False if client disconnected.
     Does NOT raise exceptions - allows caller to continue processing.
     """
@@ -69,7 +218,8 @@ async def safe_send(websocket: WebSocket, session_id: str, message: dict) -> boo
         return False
     
     try:
-        await websocket.send_json(message)
+        # Sent as a text frame since the client parses frames with JSON.parse
+        await websocket.send_text(text)
         return True
     except Exception as e:
         logger.info(f"Client disconnected from session {session_id}")
@@ -77,51 +227,64 @@ async def safe_send(websocket: WebSocket, session_id: str, message: dict) -> boo
         return False
 
 
+async def safe_send(websocket: WebSocket, session_id: str, message: dict) -> bool:
+    """Like safe_send_text, for a dict message."""
+    # orjson is several times faster than the stdlib encoder send_json uses
+    return await safe_send_text(websocket, session_id, orjson.dumps(message).decode())
+
+
 # ============================================
 # REST Endpoints for Session Persistence
 # ============================================
 
+# Encoded /api/session responses by (session_id, state version), so polling
+# a session that hasn't changed skips rebuilding and re-encoding it
+_SESSION_RESPONSE_CACHE: LRUCache = LRUCache(maxsize=512)
+
+
+async def _save_session(session_id: str, session: dict):
+    """Store a WebSocket session, bumping its version so cached responses go stale."""
+    session["_version"] = session.get("_version", 0) + 1
+    await ws_sessions.save(session_id, session)
+
+
 @router.get("/api/session/{session_id}")
-async def get_session(session_id: str):
+async def get_session(session_id: str) -> Response:
     """
     Retrieve a session by ID.
     
     Used by frontend to restore session state after page refresh.
     """
-    if session_id not in ws_sessions:
+    session = await ws_sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = ws_sessions[session_id]
+    key = (session_id, session.get("_version", 0))
+    body = _SESSION_RESPONSE_CACHE.get(key)
+    if body is None:
+        # Prepare response (same format as WebSocket progress messages)
+        body = SessionPayload(
+            session_id=session_id,
+            status=session.get("status", "unknown"),
+            plan=session.get("plan", []),
+            current_task_index=session.get("current_task_index", 0),
+            documents=[DocumentSummary.from_document(d) for d in session.get("documents", [])],
+            report=session.get("report"),
+            original_query=session.get("original_query", "")
+        ).model_dump_json().encode()
+        _SESSION_RESPONSE_CACHE[key] = body
     
-    # Prepare response (same format as WebSocket progress messages)
-    return {
-        "session_id": session_id,
-        "status": session.get("status", "unknown"),
-        "plan": session.get("plan", []),
-        "current_task_index": session.get("current_task_index", 0),
-        "documents": [
-            {
-                "title": d.get("title", ""),
-                "arxiv_id": d.get("arxiv_id", ""),
-                "pdf_url": d.get("pdf_url", ""),
-                "summary": d.get("summary", "")[:200] if d.get("summary") else ""
-            }
-            for d in session.get("documents", [])
-        ],
-        "report": session.get("report"),
-        "original_query": session.get("original_query", "")
-    }
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/api/session/{session_id}/pdf")
-async def download_session_pdf(session_id: str):
+async def download_session_pdf(session_id: str, request: Request):
     """
     Download the session report as PDF.
     """
-    if session_id not in ws_sessions:
+    session = await ws_sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = ws_sessions[session_id]
     report = session.get("report")
     
     if not report:
@@ -130,7 +293,14 @@ async def download_session_pdf(session_id: str):
     # Generate PDF
     try:
         query = session.get("original_query", "Research Report")
-        pdf_bytes = markdown_to_pdf(report, title=f"ScholarFlow: {query[:50]}")
+        # Rendering is CPU-bound, so it runs in the app's PDF worker processes
+        loop = asyncio.get_running_loop()
+        pdf_bytes = await loop.run_in_executor(
+            request.app.state.pdf_pool,
+            markdown_to_pdf,
+            report,
+            f"ScholarFlow: {query[:50]}"
+        )
         
         return Response(
             content=pdf_bytes,
@@ -149,15 +319,16 @@ async def list_sessions():
     """
     List all active sessions (for debugging).
     """
+    stored = await ws_sessions.items()
     return {
-        "count": len(ws_sessions),
+        "count": len(stored),
         "sessions": [
             {
                 "session_id": sid,
                 "status": session.get("status"),
                 "query": session.get("original_query", "")[:50]
             }
-            for sid, session in ws_sessions.items()
+            for sid, session in stored
         ]
     }
 
@@ -166,6 +337,30 @@ async def list_sessions():
 # WebSocket Research Endpoint
 # ============================================
 
+def _put_latest(queue: asyncio.Queue, message: Optional[str]):
+    """Put a message on a size-1 queue, replacing one that hasn't been sent yet."""
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        queue.get_nowait()
+        queue.put_nowait(message)
+
+
+async def _send_progress(websocket: WebSocket, session_id: str, queue: asyncio.Queue):
+    """
+    Send progress frames from a latest-only queue until it yields None.
+    
+    While a frame is being sent, newer node updates replace each other in
+    the queue, so a slow client gets the current state instead of a backlog.
+    """
+    while True:
+        message = await queue.get()
+        if message is None:
+            return
+        # Keeps draining after a disconnect (safe_send_text returns immediately)
+        await safe_send_text(websocket, session_id, message)
+
+
 async def run_research_step_by_step(websocket: WebSocket, session_id: str, query: str):
     """
     Run research workflow and stream progress via WebSocket.
@@ -190,66 +385,61 @@ async def run_research_step_by_step(websocket: WebSocket, session_id: str, query
         # Create initial state
         initial_state = create_initial_state(session_id, query)
         
-        # Store initial state immediately for persistence
-        ws_sessions[session_id] = {
+        # The stored session is this one dict, updated in place as nodes finish.
+        # Own copies of the accumulated lists, so updates can extend them in place
+        current_state = {
             **initial_state,
+            "documents": list(initial_state.get("documents", [])),
+            "logs": list(initial_state.get("logs", [])),
             "original_query": query,
             "status": "planning"
         }
         
-        # Get the research graph
-        graph = get_research_graph()
+        # Store initial state immediately for persistence
+        await _save_session(session_id, current_state)
+        
+        # The research graph compiled once at startup (see main.startup_event)
+        graph = websocket.app.state.research_graph
         
         # Stream the graph execution - this yields after each node
         step_count = 0
-        current_state = initial_state
         
-        # Use stream() instead of invoke() for step-by-step updates
-        async for event in graph.astream(initial_state, stream_mode="updates"):
-            step_count += 1
-            
-            # Extract node name and state update
-            for node_name, state_update in event.items():
-                logger.info(f"Step {step_count}: {node_name}")
-                
-                # Merge state updates
-                if isinstance(state_update, dict):
-                    for key, value in state_update.items():
-                        if key == "documents" and isinstance(value, list):
-                            # Append documents
-                            current_docs = current_state.get("documents", [])
-                            current_state["documents"] = current_docs + value
-                        elif key == "logs" and isinstance(value, list):
-                            # Append logs
-                            current_logs = current_state.get("logs", [])
-                            current_state["logs"] = current_logs + value
-                        else:
-                            current_state[key] = value
-                
-                # *** PERSISTENCE: Store state after EACH node ***
-                ws_sessions[session_id] = {
-                    **current_state,
-                    "original_query": query,
-                    "status": current_state.get("status", "unknown")
-                }
-                
-                # Try to send update to client (continues even if fails)
-                await safe_send(websocket, session_id, {
-                    "type": "progress",
-                    "node": node_name,
-                    "step": step_count,
-                    "status": current_state.get("status", "unknown"),
-                    "plan": current_state.get("plan", []),
-                    "current_task_index": current_state.get("current_task_index", 0),
-                    "documents": [
-                        {"title": d.get("title", ""), "arxiv_id": d.get("arxiv_id", "")}
-                        for d in current_state.get("documents", [])
-                    ],
-                    "logs": current_state.get("logs", [])[-5:]  # Last 5 logs
-                })
+        # Progress frames go out from a separate task so the graph never waits
+        # on the socket; only the latest unsent frame is kept
+        progress: asyncio.Queue = asyncio.Queue(maxsize=1)
+        encoder = ProgressEncoder()
+        sender = asyncio.create_task(_send_progress(websocket, session_id, progress))
+        
+        try:
+            # Use stream() instead of invoke() for step-by-step updates
+            async for event in graph.astream(initial_state, stream_mode="updates"):
+                step_count += 1
                 
-                # Small delay
-                await asyncio.sleep(0.05)
+                # Extract node name and state update
+                for node_name, state_update in event.items():
+                    logger.info(f"Step {step_count}: {node_name}")
+                    
+                    # Merge state updates
+                    if isinstance(state_update, dict):
+                        for key, value in state_update.items():
+                            if key in ("documents", "logs") and isinstance(value, list):
+                                # Append in place instead of copying the whole list each step
+                                current_state[key].extend(value)
+                            else:
+                                current_state[key] = value
+                    
+                    current_state["original_query"] = query
+                    current_state["status"] = current_state.get("status", "unknown")
+                    
+                    # *** PERSISTENCE: Store state after EACH node ***
+                    await _save_session(session_id, current_state)
+                    
+                    # Queue update for the client (continues even if it can't be sent)
+                    _put_latest(progress, encoder.encode(node_name, step_count, current_state))
+        finally:
+            # Let the sender deliver the last frame, then stop it
+            await progress.put(None)
+            await sender
         
         # Get final report
         report = None
@@ -263,47 +453,38 @@ async def run_research_step_by_step(websocket: WebSocket, session_id: str, query
                     report = last_msg.content
         
         # *** PERSISTENCE: Store final state with report ***
-        ws_sessions[session_id] = {
-            **current_state,
-            "original_query": query,
-            "status": "completed",
-            "report": report
-        }
+        current_state["status"] = "completed"
+        current_state["report"] = report
+        await _save_session(session_id, current_state)
         
         logger.info(f"Research completed for session {session_id}")
         
+        # Deliver any agent events still queued before the completion message
+        await manager.flush(session_id)
+        
         # Try to send completion (continues even if fails)
-        await safe_send(websocket, session_id, {
-            "type": "completed",
-            "session_id": session_id,
-            "report": report,
-            "documents": [
-                {
-                    "title": d.get("title", ""),
-                    "arxiv_id": d.get("arxiv_id", ""),
-                    "pdf_url": d.get("pdf_url", ""),
-                    "summary": d.get("summary", "")[:200] if d.get("summary") else ""
-                }
-                for d in current_state.get("documents", [])
-            ]
-        })
+        await safe_send_text(websocket, session_id, CompletedFrame(
+            session_id=session_id,
+            report=report,
+            documents=[DocumentSummary.from_document(d) for d in current_state.get("documents", [])]
+        ).model_dump_json())
         
     except Exception as e:
         logger.error(f"Research error: {e}")
         # Store error state
-        ws_sessions[session_id] = {
-            **ws_sessions.get(session_id, {}),
-            "status": "error",
-            "error": str(e)
-        }
+        session = await ws_sessions.get(session_id) or {}
+        session["status"] = "error"
+        session["error"] = str(e)
+        await _save_session(session_id, session)
         # Try to send error (non-fatal if fails)
         await safe_send(websocket, session_id, {
             "type": "error",
             "message": str(e)
         })
     finally:
-        # Cleanup
+        # Cleanup (including prefetches a run that ended early left behind)
         client_connected.pop(session_id, None)
+        cancel_prefetch(session_id)
 
 
 @router.websocket("/ws/research")
@@ -319,6 +500,9 @@ async def websocket_research(websocket: WebSocket):
     await websocket.accept()
     session_id = str(uuid.uuid4())
     
+    # Register with the manager so agent events reach this client
+    manager.register(websocket, session_id)
+    
     try:
         # Wait for initial message with query
         data = await websocket.receive_json()
@@ -2,21 +2,125 @@
 ArXiv Search Tool
 
 Provides functionality to search ArXiv for academic papers with:
+- Async requests to the ArXiv Atom API (no blocked worker threads)
 - Rate limiting to respect API constraints
-- LRU caching for repeated queries
+- TTL + LRU caching for repeated queries
 - Exponential backoff for resilience
 """
 
-import arxiv
-from typing import List, Dict, Optional
-from functools import lru_cache
-import time
+from typing import List, Dict, Optional, Tuple
+import asyncio
 import logging
+import re
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import httpx
+from cachetools import TTLCache
 
 from app.config import settings
+from app.tools.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+
+# Attempts per request before giving up (each one waits out the backoff)
+ARXIV_MAX_ATTEMPTS = 3
+
+# Namespaces used in ArXiv API responses
+_NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "arxiv": "http://arxiv.org/schemas/atom",
+}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Search results by (normalized query, max_results), shared by every
+# ArxivSearcher. Results for a query change on the order of days, so
+# reuse them for hours
+_SEARCH_CACHE: TTLCache = TTLCache(
+    maxsize=settings.ARXIV_CACHE_MAX_ENTRIES,
+    ttl=settings.ARXIV_CACHE_TTL_SECONDS
+)
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+
+def _normalize_query(query: str) -> str:
+    """
+    Cache key form of a query: lowercased, whitespace collapsed, interned.
+    
+    Queries differing only in case or spacing hit the same cache entry, and
+    interning keeps one copy of each key string across sessions.
+    """
+    return sys.intern(" ".join(query.lower().split()))
+
+
+def _text(elem: ET.Element, path: str) -> str:
+    found = elem.find(path, _NS)
+    if found is None or found.text is None:
+        return ""
+    return found.text
+
+
+def _parse_datetime(value: str) -> Optional[str]:
+    """Normalize an Atom timestamp ("2016-05-26T17:59:46Z") to ISO format in UTC."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _parse_entry(entry: ET.Element) -> Optional[Dict]:
+    """Convert an Atom <entry> into a paper metadata dict."""
+    entry_id = _text(entry, "atom:id")
+    # Invalid queries come back as a single entry under /api/errors
+    if not entry_id or "/api/errors" in entry_id:
+        return None
+    
+    pdf_url = None
+    for link in entry.iterfind("atom:link", _NS):
+        if link.get("title") == "pdf":
+            pdf_url = link.get("href")
+            break
+    
+    primary = entry.find("arxiv:primary_category", _NS)
+    
+    return {
+        "title": _WHITESPACE_RE.sub(" ", _text(entry, "atom:title")),
+        "abstract": _text(entry, "atom:summary"),
+        "authors": [_text(a, "atom:name") for a in entry.iterfind("atom:author", _NS)],
+        "pdf_url": pdf_url,
+        "published": _parse_datetime(_text(entry, "atom:published")),
+        "arxiv_id": entry_id.split("/")[-1],
+        "categories": [c.get("term") for c in entry.iterfind("atom:category", _NS) if c.get("term")],
+        "primary_category": primary.get("term", "") if primary is not None else ""
+    }
+
+
+def parse_feed(content: bytes) -> List[Dict]:
+    """
+    Parse an ArXiv API Atom response.
+    
+    Args:
+        content: Raw response body
+    
+    Returns:
+        Paper metadata dictionaries, in feed order
+    """
+    root = ET.fromstring(content)
+    papers = []
+    for entry in root.iterfind("atom:entry", _NS):
+        paper = _parse_entry(entry)
+        if paper is not None:
+            papers.append(paper)
+    return papers
+
 
 class ArxivSearcher:
     """
@@ -31,18 +135,21 @@ class ArxivSearcher:
         self._last_request_time = 0
         self._rate_limit_seconds = settings.ARXIV_RATE_LIMIT_SECONDS
         self._backoff_multiplier = 1.0
+        # Concurrent searches queue up here so requests stay spaced out
+        self._rate_limit_lock = asyncio.Lock()
     
-    def _rate_limit(self):
+    async def _rate_limit(self):
         """Implement rate limiting with exponential backoff."""
-        elapsed = time.time() - self._last_request_time
-        wait_time = self._rate_limit_seconds * self._backoff_multiplier
-        
-        if elapsed < wait_time:
-            sleep_time = wait_time - elapsed
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f}s")
-            time.sleep(sleep_time)
-        
-        self._last_request_time = time.time()
+        async with self._rate_limit_lock:
+            elapsed = time.monotonic() - self._last_request_time
+            wait_time = self._rate_limit_seconds * self._backoff_multiplier
+            
+            if elapsed < wait_time:
+                sleep_time = wait_time - elapsed
+                logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f}s")
+                await asyncio.sleep(sleep_time)
+            
+            self._last_request_time = time.monotonic()
     
     def _reset_backoff(self):
         """Reset backoff multiplier after successful request."""
@@ -52,16 +159,40 @@ class ArxivSearcher:
         """Increase backoff multiplier after failure."""
         self._backoff_multiplier = min(self._backoff_multiplier * 2, 32.0)
     
-    def search(self, query: str, max_results: int = None) -> List[Dict]:
+    async def _request(self, params: Dict[str, str]) -> List[Dict]:
+        """
+        Query the ArXiv API, retrying failed requests with backoff.
+        
+        Args:
+            params: Query string parameters
+        
+        Returns:
+            Parsed papers from the response
+        """
+        for attempt in range(1, ARXIV_MAX_ATTEMPTS + 1):
+            await self._rate_limit()
+            try:
+                response = await get_http_client().get(ARXIV_API_URL, params=params, timeout=30.0)
+                response.raise_for_status()
+                papers = parse_feed(response.content)
+                self._reset_backoff()
+                return papers
+            except (httpx.HTTPError, ET.ParseError) as e:
+                self._increase_backoff()
+                if attempt == ARXIV_MAX_ATTEMPTS:
+                    raise
+                logger.warning(f"ArXiv request failed (attempt {attempt}/{ARXIV_MAX_ATTEMPTS}): {e}")
+    
+    async def search(self, query: str, max_results: int = None) -> Tuple[Dict, ...]:
         """
         Search ArXiv for papers matching the query.
         
         Args:
             query: Search query string
             max_results: Maximum number of results (defaults to config value)
-            
+        
         Returns:
-            List of paper metadata dictionaries containing:
+            Tuple of paper metadata dictionaries containing:
             - title: Paper title
             - abstract: Paper abstract/summary
             - authors: List of author names
@@ -69,78 +200,61 @@ class ArxivSearcher:
             - published: Publication date (ISO format)
             - arxiv_id: ArXiv paper ID
         """
-        # Use cached version for repeated queries
-        return self._cached_search(query, max_results or self.max_results)
-    
-    @lru_cache(maxsize=100)
-    def _cached_search(self, query: str, max_results: int) -> tuple:
-        """Cached search implementation (returns tuple for hashability)."""
-        self._rate_limit()
+        max_results = max_results or self.max_results
+        
+        # Use cached results for repeated queries (cache hits skip the rate limit)
+        key = (_normalize_query(query), max_results)
+        with _SEARCH_CACHE_LOCK:
+            cached = _SEARCH_CACHE.get(key)
+        if cached is not None:
+            logger.info(f"ArXiv cache hit for: '{query}'")
+            return cached
         
+        results = await self._search(query, max_results)
+        with _SEARCH_CACHE_LOCK:
+            _SEARCH_CACHE[key] = results
+        return results
+    
+    async def _search(self, query: str, max_results: int) -> Tuple[Dict, ...]:
+        """Uncached search implementation (returns an immutable tuple for caching)."""
         logger.info(f"Searching ArXiv for: '{query}' (max {max_results} results)")
         
         try:
-            search = arxiv.Search(
-                query=query,
-                max_results=max_results,
-                sort_by=arxiv.SortCriterion.Relevance
-            )
-            
-            results = []
-            for paper in search.results():
-                results.append({
-                    "title": paper.title,
-                    "abstract": paper.summary,
-                    "authors": [a.name for a in paper.authors],
-                    "pdf_url": paper.pdf_url,
-                    "published": paper.published.isoformat() if paper.published else None,
-                    "arxiv_id": paper.entry_id.split("/")[-1],
-                    "categories": paper.categories,
-                    "primary_category": paper.primary_category
-                })
+            results = await self._request({
+                "search_query": query,
+                "sortBy": "relevance",
+                "sortOrder": "descending",
+                "start": "0",
+                "max_results": str(max_results)
+            })
             
-            self._reset_backoff()
             logger.info(f"Found {len(results)} papers")
             
             # Return as tuple for caching (convert back to list when using)
-            return tuple(results)
-            
+            return tuple(results[:max_results])
+        
         except Exception as e:
-            self._increase_backoff()
             logger.error(f"ArXiv search failed: {e}")
             raise
     
-    def search_by_id(self, arxiv_id: str) -> Optional[Dict]:
+    async def search_by_id(self, arxiv_id: str) -> Optional[Dict]:
         """
         Fetch a specific paper by its ArXiv ID.
         
         Args:
             arxiv_id: The ArXiv paper ID (e.g., "2301.00001")
-            
+        
         Returns:
             Paper metadata dictionary, or None if not found
         """
-        self._rate_limit()
-        
         try:
-            search = arxiv.Search(id_list=[arxiv_id])
-            results = list(search.results())
+            results = await self._request({"id_list": arxiv_id, "max_results": "1"})
             
             if results:
-                paper = results[0]
-                return {
-                    "title": paper.title,
-                    "abstract": paper.summary,
-                    "authors": [a.name for a in paper.authors],
-                    "pdf_url": paper.pdf_url,
-                    "published": paper.published.isoformat() if paper.published else None,
-                    "arxiv_id": arxiv_id,
-                    "categories": paper.categories,
-                    "primary_category": paper.primary_category
-                }
+                return {**results[0], "arxiv_id": arxiv_id}
             
             return None
-            
+        
         except Exception as e:
             logger.error(f"ArXiv ID lookup failed: {e}")
             raise
@@ -0,0 +1,37 @@
+"""
+Shared HTTP Client
+
+One HTTP/2 connection pool for the tools' outbound requests (ArXiv API
+queries and PDF downloads), so consecutive requests to arxiv.org reuse
+open connections instead of paying a new TCP + TLS handshake each.
+"""
+
+from typing import Optional
+
+import httpx
+
+_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client, created on first use (binds to the running loop)."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=_TIMEOUT,
+            limits=_LIMITS,
+            follow_redirects=True
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared client, if it was created."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -9,16 +9,86 @@ Provides functionality to download and parse academic PDFs:
 """
 
 import fitz  # PyMuPDF
-import httpx
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import hashlib
+import io
 import logging
+import multiprocessing
+import threading
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from app.config import settings
+from app.db.pdf_cache import parsed_pdf_cache
+from app.tools.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever get_summary_prompt changes, so cached summaries are regenerated
+SUMMARY_PROMPT_VERSION = "v1"
+
+# Bump whenever extraction or chunking output changes, so cached parses are redone
+PARSED_PDF_CACHE_VERSION = "v2"
+
+# PDF size and page limits in LIGHTWEIGHT_MODE
+LIGHTWEIGHT_MAX_PDF_MB = 3.0
+LIGHTWEIGHT_MAX_PAGES = 15
+
+# Download read size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Plain-text extraction flags: the default text mode, but with ligatures
+# expanded ("ﬁ" -> "fi") and words hyphenated across line breaks rejoined,
+# which is cheaper for MuPDF and gives cleaner text to chunk and search
+TEXT_EXTRACT_FLAGS = (fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES) | fitz.TEXT_DEHYPHENATE
+
+# Documents with at least this many pages are split across the extraction workers
+PARALLEL_EXTRACT_MIN_PAGES = 8
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = threading.Lock()
+
+
+def _page_texts(doc: fitz.Document, start: int, stop: int, flags: int) -> Iterator[str]:
+    """Plain text of pages [start, stop), in reading order as stored."""
+    for page in doc.pages(start, stop):
+        yield page.get_text("text", flags=flags, sort=False)
+
+
+def _extract_pages(pdf_bytes: bytes, start: int, stop: int, flags: int) -> List[str]:
+    """Extract the text of pages [start, stop); runs in the extraction workers."""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return list(_page_texts(doc, start, stop, flags))
+    finally:
+        doc.close()
+
+
+def _get_extract_pool(num_workers: int) -> ProcessPoolExecutor:
+    """Start the extraction worker processes on first use (sized by the first caller)."""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # spawn, not fork: the server process has threads (event loop helpers,
+            # embedding libraries) that a forked child could inherit mid-lock
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started {num_workers} PDF extraction workers")
+        return _extract_pool
+
+
+def shutdown_extract_pool():
+    """Stop the extraction worker processes, if they were started."""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(cancel_futures=True)
+            _extract_pool = None
+
 
 class PDFParser:
     """
@@ -31,10 +101,16 @@ class PDFParser:
     def __init__(
         self,
         chunk_size: int = None,
-        chunk_overlap: int = None
+        chunk_overlap: int = None,
+        num_workers: int = None,
+        extraction_flags: int = None
     ):
         self.chunk_size = chunk_size or settings.PDF_CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or settings.PDF_CHUNK_OVERLAP
+        # Page ranges a long PDF is split into for parallel extraction (1 = in-process)
+        self.num_workers = num_workers or settings.PDF_EXTRACT_WORKERS
+        # PyMuPDF TEXT_* flags for page.get_text
+        self.extraction_flags = TEXT_EXTRACT_FLAGS if extraction_flags is None else extraction_flags
         
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
@@ -58,57 +134,103 @@ class PDFParser:
         """
         logger.info(f"Downloading PDF from: {pdf_url}")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(pdf_url, follow_redirects=True)
+        # Only enforce size limit on resource-constrained servers
+        max_bytes = int(LIGHTWEIGHT_MAX_PDF_MB * 1024 * 1024) if settings.LIGHTWEIGHT_MODE else None
+        
+        async with get_http_client().stream("GET", pdf_url) as response:
             response.raise_for_status()
             
-            size_bytes = len(response.content)
-            size_mb = size_bytes / (1024 * 1024)
+            # Skip the body entirely when the server already says it's too big
+            declared = response.headers.get("content-length")
+            if max_bytes is not None and declared and declared.isdigit() and int(declared) > max_bytes:
+                declared_mb = int(declared) / (1024 * 1024)
+                logger.warning(f"PDF too large: {declared_mb:.1f}MB > {LIGHTWEIGHT_MAX_PDF_MB:.0f}MB limit (LIGHTWEIGHT_MODE)")
+                raise ValueError(f"PDF too large ({declared_mb:.1f}MB), skipping to save server resources")
             
-            # Only enforce size limit on resource-constrained servers
-            if settings.LIGHTWEIGHT_MODE and size_mb > 3.0:
-                logger.warning(f"PDF too large: {size_mb:.1f}MB > 3MB limit (LIGHTWEIGHT_MODE)")
-                raise ValueError(f"PDF too large ({size_mb:.1f}MB), skipping to save server resources")
-            
-            logger.info(f"Downloaded {size_bytes} bytes ({size_mb:.1f}MB)")
-            return response.content
+            # Read in chunks so an oversized PDF is abandoned as soon as it
+            # crosses the limit instead of after the whole file has arrived.
+            # BytesIO.getvalue() hands over its buffer without a final copy,
+            # so peak memory stays ~1x the PDF (joining chunks needs 2x)
+            buffer = io.BytesIO()
+            async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                buffer.write(chunk)
+                
+                if max_bytes is not None and buffer.tell() > max_bytes:
+                    logger.warning(f"PDF too large: over {LIGHTWEIGHT_MAX_PDF_MB:.0f}MB limit (LIGHTWEIGHT_MODE), download aborted")
+                    raise ValueError(f"PDF too large (over {LIGHTWEIGHT_MAX_PDF_MB:.0f}MB), skipping to save server resources")
+        
+        size_bytes = buffer.tell()
+        size_mb = size_bytes / (1024 * 1024)
+        logger.info(f"Downloaded {size_bytes} bytes ({size_mb:.1f}MB)")
+        return buffer.getvalue()
     
-    def extract_text(self, pdf_bytes: bytes) -> str:
+    def iter_pages(self, pdf_bytes: bytes, max_chars: Optional[int] = None) -> Iterator[str]:
         """
-        Extract text from PDF bytes using PyMuPDF.
+        Extract text from PDF bytes using PyMuPDF, one page at a time.
         
         Args:
             pdf_bytes: PDF file contents
+            max_chars: Stop after the page that brings the text to this many
+                characters (pages are then extracted in-process, in order)
             
-        Returns:
-            Extracted text from pages
+        Yields:
+            Text of each extracted page, in order
         """
-        logger.info("Extracting text from PDF")
-        
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        full_text = ""
-        total_pages = len(doc)
-        
-        # Limit pages only on resource-constrained servers
-        max_pages = 15 if settings.LIGHTWEIGHT_MODE else total_pages
-        pages_to_extract = min(total_pages, max_pages)
-        
-        if total_pages > pages_to_extract:
-            logger.info(f"Large PDF ({total_pages} pages), extracting first {pages_to_extract} pages only (LIGHTWEIGHT_MODE)")
         
         try:
-            for page_num in range(pages_to_extract):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-                full_text += page_text
-                
-                # Add page separator for clarity
-                if page_num < pages_to_extract - 1:
-                    full_text += "\n\n"
+            total_pages = len(doc)
+            
+            # Limit pages only on resource-constrained servers
+            max_pages = LIGHTWEIGHT_MAX_PAGES if settings.LIGHTWEIGHT_MODE else total_pages
+            pages_to_extract = min(total_pages, max_pages)
+            
+            if total_pages > pages_to_extract:
+                logger.info(f"Large PDF ({total_pages} pages), extracting first {pages_to_extract} pages only (LIGHTWEIGHT_MODE)")
+            logger.info(f"Extracting text from {pages_to_extract}/{total_pages} PDF pages")
+            
+            workers = self.num_workers
+            parallel = workers > 1 and pages_to_extract >= PARALLEL_EXTRACT_MIN_PAGES and not max_chars
+            if not parallel:
+                extracted = 0
+                for text in _page_texts(doc, 0, pages_to_extract, self.extraction_flags):
+                    yield text
+                    extracted += len(text)
+                    if max_chars and extracted >= max_chars:
+                        logger.info(f"Stopped extraction at {extracted} characters (max_chars={max_chars})")
+                        break
         finally:
             doc.close()
         
-        logger.info(f"Extracted {len(full_text)} characters from {pages_to_extract}/{total_pages} pages")
+        if parallel:
+            # Contiguous page ranges, one per worker, each reopening the document
+            step = -(-pages_to_extract // workers)
+            pool = _get_extract_pool(workers)
+            futures = [
+                pool.submit(
+                    _extract_pages, pdf_bytes, start, min(start + step, pages_to_extract),
+                    self.extraction_flags
+                )
+                for start in range(0, pages_to_extract, step)
+            ]
+            for future in futures:
+                yield from future.result()
+    
+    def extract_text(self, pdf_bytes: bytes, max_chars: Optional[int] = None) -> str:
+        """
+        Extract text from PDF bytes using PyMuPDF.
+        
+        Args:
+            pdf_bytes: PDF file contents
+            max_chars: Stop extracting pages once this many characters are read
+            
+        Returns:
+            Extracted text from pages
+        """
+        # Page separator for clarity; joined once instead of concatenating per page
+        full_text = "\n\n".join(self.iter_pages(pdf_bytes, max_chars))
+        
+        logger.info(f"Extracted {len(full_text)} characters")
         return full_text
     
     def chunk_text(self, text: str) -> List[str]:
@@ -125,47 +247,195 @@ class PDFParser:
         logger.info(f"Split text into {len(chunks)} chunks")
         return chunks
     
-    async def download_and_parse(self, pdf_url: str, skip_chunks: bool = False) -> Dict:
+    def chunk_pages(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Split page texts into chunks without joining them into one string.
+        
+        Yields exactly what chunk_text gives for the pages joined with blank
+        lines, as extract_text joins them. The splitter cuts that text at
+        blank lines and merges consecutive paragraphs shorter than chunk_size
+        (with overlap); a longer paragraph ends the merge and is split on its
+        own. So text is only held until the next long paragraph, where the
+        pending run of short paragraphs and the long one can be split
+        separately with the same result.
+        
+        Args:
+            pages: Page texts, in order
+            
+        Yields:
+            Text chunks
+        """
+        buffer = ""
+        run_start = 0  # Start of the short paragraphs not yet split
+        para_start = 0  # Start of the paragraph still being read
+        search_from = 0
+        
+        def split_paragraph(end: int) -> Iterator[str]:
+            nonlocal run_start
+            if end - para_start >= self.chunk_size:
+                if run_start < para_start:
+                    yield from self.splitter.split_text(buffer[run_start:para_start])
+                yield from self.splitter.split_text(buffer[para_start:end])
+                run_start = end
+        
+        for i, page in enumerate(pages):
+            buffer = f"{buffer}\n\n{page}" if i else page
+            # Blank lines are matched left to right, so the ones found are
+            # final; the paragraph after the last one may continue on the next page
+            while (end := buffer.find("\n\n", search_from)) != -1:
+                yield from split_paragraph(end)
+                para_start, search_from = end, end + 2
+            
+            buffer = buffer[run_start:]
+            para_start -= run_start
+            search_from -= run_start
+            run_start = 0
+        
+        yield from split_paragraph(len(buffer))
+        if run_start < len(buffer):
+            yield from self.splitter.split_text(buffer[run_start:])
+    
+    def extract_and_chunk_streaming(self, pdf_bytes: bytes) -> Iterator[str]:
+        """
+        Extract and chunk a PDF page by page.
+        
+        Only the current page and any short paragraphs still waiting to be
+        merged are held, instead of the whole document text.
+        
+        Args:
+            pdf_bytes: PDF file contents
+            
+        Yields:
+            Text chunks
+        """
+        yield from self.chunk_pages(self.iter_pages(pdf_bytes))
+    
+    def cache_key(self, pdf_bytes: bytes, max_chars: Optional[int] = None) -> str:
+        """
+        Parsed PDF cache key: a hash of the PDF and everything that shapes the output.
+        
+        Args:
+            pdf_bytes: PDF file contents
+            max_chars: Extraction limit the PDF is parsed with
+            
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.blake2b(pdf_bytes, digest_size=32)
+        max_pages = LIGHTWEIGHT_MAX_PAGES if settings.LIGHTWEIGHT_MODE else 0
+        digest.update(
+            f"{PARSED_PDF_CACHE_VERSION}:{fitz.VersionBind}:{self.chunk_size}:{self.chunk_overlap}:"
+            f"{self.extraction_flags}:{max_pages}:{settings.MAX_CONTEXT_CHARS}:{max_chars or 0}".encode()
+        )
+        return digest.hexdigest()
+    
+    def _parse(
+        self,
+        pdf_bytes: bytes,
+        skip_chunks: bool,
+        max_chars: Optional[int] = None
+    ) -> Tuple[str, List[str], int]:
+        """
+        Extract (and chunk) a PDF, reusing an earlier parse of the same bytes.
+        
+        Returns:
+            (text_for_summary, chunks, total characters)
+        """
+        key = None
+        if parsed_pdf_cache is not None:
+            key = self.cache_key(pdf_bytes, max_chars)
+            cached = parsed_pdf_cache.get(key, need_chunks=not skip_chunks)
+            if cached is not None:
+                logger.info(f"Parsed PDF cache hit ({cached['num_characters']} characters)")
+                chunks = [] if skip_chunks else cached["chunks"]
+                return cached["text_for_summary"], chunks, cached["num_characters"]
+        
+        # One pass over the pages, never building the full document text;
+        # the summary only needs the first MAX_CONTEXT_CHARS (8KB) of it
+        chunks, text_for_summary, num_chars = self._extract_chunks(
+            pdf_bytes, settings.MAX_CONTEXT_CHARS, chunk=not skip_chunks, max_chars=max_chars
+        )
+        
+        if key is not None:
+            parsed_pdf_cache.put(key, text_for_summary, None if skip_chunks else chunks, num_chars)
+        return text_for_summary, chunks, num_chars
+    
+    def _extract_chunks(
+        self,
+        pdf_bytes: bytes,
+        summary_chars: int,
+        chunk: bool = True,
+        max_chars: Optional[int] = None
+    ) -> Tuple[List[str], str, int]:
+        """
+        Extract (and chunk) a PDF in one streaming pass, noting what download_and_parse reports.
+        
+        Returns:
+            (chunks (empty unless chunk), first summary_chars characters of the
+            text, total characters)
+        """
+        head = []
+        head_len = 0
+        num_chars = 0
+        
+        def pages():
+            nonlocal head_len, num_chars
+            for text in self.iter_pages(pdf_bytes, max_chars):
+                if head_len < summary_chars:
+                    head.append(text)
+                    head_len += len(text) + 2
+                # +2 for the page separator extract_text would add
+                num_chars += len(text) + 2
+                yield text
+        
+        if chunk:
+            chunks = list(self.chunk_pages(pages()))
+            logger.info(f"Split {max(num_chars - 2, 0)} characters into {len(chunks)} chunks")
+        else:
+            chunks = []
+            for _ in pages():
+                pass
+            logger.info(f"Extracted {max(num_chars - 2, 0)} characters")
+        return chunks, "\n\n".join(head)[:summary_chars], max(num_chars - 2, 0)
+    
+    async def download_and_parse(
+        self,
+        pdf_url: str,
+        skip_chunks: bool = False,
+        pdf_bytes: Optional[bytes] = None,
+        max_chars: Optional[int] = None
+    ) -> Dict:
         """
         Full pipeline: download PDF, extract text, and chunk it.
         
         Args:
             pdf_url: URL to the PDF file
             skip_chunks: If True, skip chunking (for memory-constrained environments)
+            pdf_bytes: Already-downloaded PDF contents; skips the download
+            max_chars: Stop extracting pages once this many characters are read
+                (e.g. MAX_CONTEXT_CHARS when only the summary text is needed)
             
         Returns:
             Dictionary containing:
             - text_for_summary: Truncated text for LLM summarization
             - chunks: List of text chunks (empty if skip_chunks=True)
             - num_chunks: Number of chunks
-            - num_characters: Total character count
+            - num_characters: Total character count (of the pages read, with max_chars)
             - source_url: Original PDF URL
         """
         try:
-            # Download
-            pdf_bytes = await self.download_pdf(pdf_url)
+            # Download (unless the bytes were prefetched)
+            if pdf_bytes is None:
+                pdf_bytes = await self.download_pdf(pdf_url)
             
-            # Extract text
-            full_text = self.extract_text(pdf_bytes)
+            # Extract (and chunk) off the event loop, or reuse an earlier parse
+            text_for_summary, chunks, num_chars = await asyncio.to_thread(
+                self._parse, pdf_bytes, skip_chunks, max_chars
+            )
             
             # Free PDF bytes immediately to save memory
             del pdf_bytes
             
-            # Get truncated text for summarization (8KB max)
-            text_for_summary = full_text[:settings.MAX_CONTEXT_CHARS]
-            
-            # Chunk only if needed (for vector storage)
-            if skip_chunks:
-                chunks = []
-            else:
-                chunks = self.chunk_text(full_text)
-            
-            num_chars = len(full_text)
-            
-            # Free full text if we only need summary
-            if skip_chunks:
-                del full_text
-            
             return {
                 "text_for_summary": text_for_summary,
                 "chunks": chunks,
@@ -240,3 +510,31 @@ Answer the question based only on the information in the excerpt. If the informa
 
 # Global instance for convenience
 pdf_parser = PDFParser()
+
+
+if __name__ == "__main__":
+    # Self-check: python -m app.tools.pdf_parser
+    # chunk_pages must match splitting the joined text, which chunk IDs depend on
+    import random
+    
+    def _random_pages(rng: random.Random) -> List[str]:
+        words = ["the", "model", "attention", "gradient", "we", "results", "a"]
+        
+        def line() -> str:
+            return " ".join(rng.choice(words) for _ in range(rng.randint(1, 40)))
+        
+        def paragraph() -> str:
+            return "\n".join(line() for _ in range(rng.randint(1, 15)))
+        
+        return [
+            rng.choice(["", "\n", "\n\n\n"]) + "\n\n".join(paragraph() for _ in range(rng.randint(0, 6)))
+            for _ in range(rng.randint(0, 30))
+        ]
+    
+    parsers = [pdf_parser, PDFParser(chunk_size=200, chunk_overlap=50)]
+    for seed in range(200):
+        pages = _random_pages(random.Random(seed))
+        for parser in parsers:
+            expected = parser.splitter.split_text("\n\n".join(pages))
+            assert list(parser.chunk_pages(pages)) == expected, f"chunk_pages mismatch (seed {seed}, chunk_size {parser.chunk_size})"
+    print("chunk_pages matches split_text on the joined pages")
@@ -3,48 +3,196 @@ PDF Report Generator
 
 Converts Markdown reports to PDF using fpdf2.
 Lightweight solution suitable for Render free tier.
+
+Uses the built-in Latin-1 fonts (Unicode punctuation and symbols are
+replaced with ASCII) unless PDF_UNICODE_FONT_DIR points at DejaVu fonts.
 """
 
+import functools
 import io
 import logging
+import os
 import re
+import unicodedata
+from typing import Dict, Iterator, Optional, Tuple
+
 from fpdf import FPDF
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
 
-def strip_markdown(text: str) -> str:
-    """Remove markdown formatting from text."""
-    if not text:
-        return ""
+# Inline markdown patterns, compiled once; the output depends on the order
+# they're applied in (e.g. bold before italic, so "**x**" isn't two italics)
+_MARKDOWN_PATTERNS = [
     # Bold
-    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-    text = re.sub(r'__(.+?)__', r'\1', text)
+    (re.compile(r'\*\*(.+?)\*\*'), r'\1'),
+    (re.compile(r'__(.+?)__'), r'\1'),
     # Italic
-    text = re.sub(r'\*(.+?)\*', r'\1', text)
-    text = re.sub(r'_(.+?)_', r'\1', text)
+    (re.compile(r'\*(.+?)\*'), r'\1'),
+    (re.compile(r'_(.+?)_'), r'\1'),
     # Inline code
-    text = re.sub(r'`(.+?)`', r'\1', text)
+    (re.compile(r'`(.+?)`'), r'\1'),
     # Links [text](url)
-    text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)
+    (re.compile(r'\[(.+?)\]\(.+?\)'), r'\1'),
     # Images ![alt](url)
-    text = re.sub(r'!\[.*?\]\(.+?\)', '', text)
+    (re.compile(r'!\[.*?\]\(.+?\)'), ''),
     # Strikethrough
-    text = re.sub(r'~~(.+?)~~', r'\1', text)
+    (re.compile(r'~~(.+?)~~'), r'\1'),
+]
+
+# Every pattern above needs one of these characters to match
+_MARKDOWN_CHARS = re.compile(r'[*_`\[~]')
+
+# Ordered list item marker ("1. ")
+_ORDERED_ITEM_RE = re.compile(r'\d+\.\s')
+
+
+def strip_markdown(text: str) -> str:
+    """Remove markdown formatting from text."""
+    if not text:
+        return ""
+    # Plain text (most list items and headings) skips the pattern passes
+    if not _MARKDOWN_CHARS.search(text):
+        return text.strip()
+    for pattern, replacement in _MARKDOWN_PATTERNS:
+        text = pattern.sub(replacement, text)
     return text.strip()
 
 
+# Unicode characters Helvetica (latin-1) can't show, with ASCII equivalents
+# (not needed with PDF_UNICODE_FONT_DIR)
+_PDF_REPLACEMENTS = {
+    '\u2019': "'",   # Right single quote
+    '\u2018': "'",   # Left single quote
+    '\u201c': '"',   # Left double quote
+    '\u201d': '"',   # Right double quote
+    '\u2013': '-',   # En dash
+    '\u2014': '--',  # Em dash
+    '\u2026': '...', # Ellipsis
+    '\u00a0': ' ',   # Non-breaking space
+    '\u2022': '-',   # Bullet
+    '\u00b7': '-',   # Middle dot
+    '\u2212': '-',   # Minus sign
+    '\u2032': "'",   # Prime
+    '\u2033': '"',   # Double prime
+    '\u00d7': 'x',   # Multiplication sign
+    '\u00f7': '/',   # Division sign
+    '\u2264': '<=',  # Less than or equal
+    '\u2265': '>=',  # Greater than or equal
+    '\u2260': '!=',  # Not equal
+    '\u221e': 'inf', # Infinity
+    '\u03b1': 'alpha',
+    '\u03b2': 'beta',
+    '\u03b3': 'gamma',
+    '\u03bb': 'lambda',
+    '\u03c0': 'pi',
+    '\u03c3': 'sigma',
+    '\u2192': '->',
+    '\u2190': '<-',
+    '\u21d2': '=>',
+    '\u2248': '~',
+    '\u00b2': '^2',
+    '\u00b3': '^3',
+    '\u2081': '_1',
+    '\u2082': '_2',
+}
+
+
+# DejaVu files per (family, style) embedded when PDF_UNICODE_FONT_DIR is set.
+# fonts-dejavu-core ships no oblique face, so italic text uses the regular one
+_UNICODE_FONT_FILES = {
+    ('DejaVu', ''): 'DejaVuSans.ttf',
+    ('DejaVu', 'B'): 'DejaVuSans-Bold.ttf',
+    ('DejaVu', 'I'): 'DejaVuSans.ttf',
+    ('DejaVuMono', ''): 'DejaVuSansMono.ttf',
+}
+
+
+def _find_unicode_fonts() -> Optional[Dict[Tuple[str, str], str]]:
+    """Font file paths under PDF_UNICODE_FONT_DIR, or None to use the built-in fonts."""
+    directory = settings.PDF_UNICODE_FONT_DIR
+    if not directory:
+        return None
+    paths = {key: os.path.join(directory, name) for key, name in _UNICODE_FONT_FILES.items()}
+    missing = sorted({name for key, name in _UNICODE_FONT_FILES.items() if not os.path.isfile(paths[key])})
+    if missing:
+        logger.warning(f"PDF fonts missing from {directory}: {', '.join(missing)}; using Helvetica/Courier")
+        return None
+    return paths
+
+
+_UNICODE_FONTS = _find_unicode_fonts()
+_SANS_FONT = 'DejaVu' if _UNICODE_FONTS else 'Helvetica'
+_MONO_FONT = 'DejaVuMono' if _UNICODE_FONTS else 'Courier'
+
+
+# Runs of characters Helvetica (latin-1) can't show
+_NON_LATIN1_RE = re.compile(r'[^\x00-\xff]+')
+
+
+def _decompose(match: re.Match) -> str:
+    return unicodedata.normalize('NFKD', match.group())
+
+
+def _clean_text(text: str) -> str:
+    """Clean text for PDF output, handling encoding issues."""
+    if not text:
+        return ""
+    # An embedded Unicode font shows the text as is
+    if _UNICODE_FONTS:
+        return text
+    # Plain ASCII (most of a report) has nothing to replace or drop
+    if text.isascii():
+        return text
+    # Replace problematic Unicode characters with ASCII equivalents
+    for old, new in _PDF_REPLACEMENTS.items():
+        text = text.replace(old, new)
+    
+    # Decompose what's still outside latin-1 ("ő" -> "o" + accent, "₅" -> "5",
+    # "ﬁ" -> "fi"); latin-1 text like "é" is left composed
+    text = _NON_LATIN1_RE.sub(_decompose, text)
+    
+    # Remove any remaining non-latin1 characters (accents split off above)
+    try:
+        return text.encode('latin-1', errors='ignore').decode('latin-1')
+    except Exception:
+        return ''.join(c if ord(c) < 128 else '?' for c in text)
+
+
+# Reports repeat a lot of short strings (section names, "Key findings",
+# boilerplate bullets), so the stripped + cleaned form is memoized
+@functools.lru_cache(maxsize=4096)
+def _clean_markdown(text: str) -> str:
+    """strip_markdown then _clean_text, cached per unique input."""
+    return _clean_text(strip_markdown(text))
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """Lines of text, like text.split('\\n') but without building the list."""
+    start = 0
+    while (end := text.find('\n', start)) != -1:
+        yield text[start:end]
+        start = end + 1
+    yield text[start:]
+
+
 class ResearchReportPDF(FPDF):
     """Custom PDF class for research reports with proper styling."""
     
     def __init__(self):
         super().__init__()
+        # Registered before the first page, whose header already sets a font
+        if _UNICODE_FONTS:
+            for (family, style), path in _UNICODE_FONTS.items():
+                self.add_font(family, style, path)
         self.add_page()
         self.set_auto_page_break(auto=True, margin=15)
     
     def header(self):
         """Add header to each page."""
-        self.set_font('Helvetica', 'I', 8)
+        self.set_font(_SANS_FONT, 'I', 8)
         self.set_text_color(128, 128, 128)
         self.cell(0, 10, 'ScholarFlow Research Report', 0, 1, 'C')
         self.ln(5)
@@ -52,101 +200,52 @@ class ResearchReportPDF(FPDF):
     def footer(self):
         """Add footer with page number."""
         self.set_y(-15)
-        self.set_font('Helvetica', 'I', 8)
+        self.set_font(_SANS_FONT, 'I', 8)
         self.set_text_color(128, 128, 128)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
     
     def add_title(self, title: str):
         """Add report title."""
-        self.set_font('Helvetica', 'B', 18)
+        self.set_font(_SANS_FONT, 'B', 18)
         self.set_text_color(31, 41, 55)
-        clean_title = self._clean_text(strip_markdown(title))
+        clean_title = _clean_markdown(title)
         self.multi_cell(0, 10, clean_title, 0, 'C')
         self.ln(10)
     
     def add_heading(self, text: str, level: int = 1):
         """Add a heading (h1, h2, h3)."""
         sizes = {1: 16, 2: 14, 3: 12}
-        self.set_font('Helvetica', 'B', sizes.get(level, 12))
+        self.set_font(_SANS_FONT, 'B', sizes.get(level, 12))
         self.set_text_color(31, 41, 55)
-        clean_text = self._clean_text(strip_markdown(text))
+        clean_text = _clean_markdown(text)
         self.multi_cell(0, 8, clean_text)
         self.ln(3)
     
     def add_paragraph(self, text: str):
         """Add a paragraph of text."""
-        self.set_font('Helvetica', '', 11)
+        self.set_font(_SANS_FONT, '', 11)
         self.set_text_color(55, 65, 81)
-        clean_text = self._clean_text(strip_markdown(text))
+        clean_text = _clean_markdown(text)
         self.multi_cell(0, 6, clean_text)
         self.ln(4)
     
     def add_list_item(self, text: str, indent: int = 0):
         """Add a list item."""
-        self.set_font('Helvetica', '', 11)
+        self.set_font(_SANS_FONT, '', 11)
         self.set_text_color(55, 65, 81)
         prefix = "  " * indent + "- "
-        clean_text = self._clean_text(strip_markdown(text))
+        clean_text = _clean_markdown(text)
         self.multi_cell(0, 6, prefix + clean_text)
         self.ln(2)
     
     def add_code_block(self, text: str):
         """Add a code block."""
-        self.set_font('Courier', '', 9)
+        self.set_font(_MONO_FONT, '', 9)
         self.set_text_color(0, 0, 0)
         self.set_fill_color(245, 245, 245)
-        clean_text = self._clean_text(text)  # Don't strip markdown in code blocks
+        clean_text = _clean_text(text)  # Don't strip markdown in code blocks
         self.multi_cell(0, 5, clean_text, fill=True)
         self.ln(4)
-    
-    def _clean_text(self, text: str) -> str:
-        """Clean text for PDF output, handling encoding issues."""
-        if not text:
-            return ""
-        # Replace problematic Unicode characters with ASCII equivalents
-        replacements = {
-            '\u2019': "'",   # Right single quote
-            '\u2018': "'",   # Left single quote
-            '\u201c': '"',   # Left double quote
-            '\u201d': '"',   # Right double quote
-            '\u2013': '-',   # En dash
-            '\u2014': '--',  # Em dash
-            '\u2026': '...', # Ellipsis
-            '\u00a0': ' ',   # Non-breaking space
-            '\u2022': '-',   # Bullet
-            '\u00b7': '-',   # Middle dot
-            '\u2212': '-',   # Minus sign
-            '\u2032': "'",   # Prime
-            '\u2033': '"',   # Double prime
-            '\u00d7': 'x',   # Multiplication sign
-            '\u00f7': '/',   # Division sign
-            '\u2264': '<=',  # Less than or equal
-            '\u2265': '>=',  # Greater than or equal
-            '\u2260': '!=',  # Not equal
-            '\u221e': 'inf', # Infinity
-            '\u03b1': 'alpha',
-            '\u03b2': 'beta',
-            '\u03b3': 'gamma',
-            '\u03bb': 'lambda',
-            '\u03c0': 'pi',
-            '\u03c3': 'sigma',
-            '\u2192': '->',
-            '\u2190': '<-',
-            '\u21d2': '=>',
-            '\u2248': '~',
-            '\u00b2': '^2',
-            '\u00b3': '^3',
-            '\u2081': '_1',
-            '\u2082': '_2',
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        
-        # Remove any remaining non-latin1 characters
-        try:
-            return text.encode('latin-1', errors='ignore').decode('latin-1')
-        except Exception:
-            return ''.join(c if ord(c) < 128 else '?' for c in text)
 
 
 def markdown_to_pdf(markdown_content: str, title: str = "Research Report") -> bytes:
@@ -166,7 +265,7 @@ def markdown_to_pdf(markdown_content: str, title: str = "Research Report") -> by
     pdf.add_title(title)
     
     # Parse and render Markdown
-    lines = markdown_content.split('\n')
+    lines = _iter_lines(markdown_content)
     in_code_block = False
     code_buffer = []
     paragraph_buffer = []
@@ -213,13 +312,12 @@ def markdown_to_pdf(markdown_content: str, title: str = "Research Report") -> by
             flush_paragraph()
             pdf.add_heading(stripped[2:], level=1)
         # Handle list items
-        elif stripped.startswith('- ') or stripped.startswith('* ') or stripped.startswith('• '):
+        elif stripped.startswith(('- ', '* ', '• ')):
             flush_paragraph()
-            text = stripped[2:] if stripped.startswith('• ') else stripped[2:]
-            pdf.add_list_item(text)
-        elif re.match(r'^\d+\.\s', stripped):
+            pdf.add_list_item(stripped[2:])
+        elif stripped[0].isdigit() and (numbered := _ORDERED_ITEM_RE.match(stripped)):
             flush_paragraph()
-            pdf.add_list_item(re.sub(r'^\d+\.\s', '', stripped))
+            pdf.add_list_item(stripped[numbered.end():])
         # Regular text - add to paragraph buffer
         else:
             paragraph_buffer.append(stripped)
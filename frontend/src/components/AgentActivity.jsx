@@ -249,6 +249,24 @@ export default function AgentActivity({ session, activities = [], isLoading, isP
         </div>
       )}
 
+      {/* Report draft, streamed while the writer is still generating it */}
+      {status === 'writing' && report && (
+        <div className="px-6 py-6" style={{ 
+          borderBottom: '1px solid var(--border-subtle)',
+          background: 'var(--cream-50)'
+        }}>
+          <h3 
+            className="text-xs font-mono uppercase tracking-wider mb-3"
+            style={{ color: 'var(--text-muted)' }}
+          >
+            Report Draft
+          </h3>
+          <article className="prose-editorial max-w-none">
+            <ReactMarkdown remarkPlugins={[remarkGfm]}>{report}</ReactMarkdown>
+          </article>
+        </div>
+      )}
+
       {/* Activity Log */}
       <div className="px-6 py-4" style={{ background: 'var(--cream-50)' }}>
         <h3 
@@ -346,6 +346,8 @@ export function useResearch() {
               addActivity('planning', 'Plan created', `${plan.length} questions`);
             } else if (data.node === 'researcher') {
               addActivity('researching', `Question ${taskIdx + 1}/${plan.length}`, plan[taskIdx]?.substring(0, 50));
+            } else if (data.node === 'researcher_batch') {
+              addActivity('researching', `Researched ${plan.length} questions`);
             } else if (data.node === 'writer') {
               addActivity('writing', 'Writing report...');
             }
@@ -373,6 +375,16 @@ export function useResearch() {
             addActivity('paper_done', `Processed: ${data.title?.substring(0, 50) || data.arxiv_id}`, data.arxiv_id);
             break;
 
+          case 'report_chunk':
+            // Report text streamed by the writer as it is generated.
+            // Not persisted per chunk; the completed message carries the full report.
+            setSession(prev => prev && {
+              ...prev,
+              status: prev.status === 'completed' ? prev.status : 'writing',
+              report: (prev.report || '') + (data.text || '')
+            });
+            break;
+
           case 'completed':
             addActivity('completed', 'Research complete!');
             const completedSession = {